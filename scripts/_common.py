@@ -0,0 +1,632 @@
+#!/usr/bin/env python3
+"""
+Utilitários compartilhados pelos scripts de teste da API.
+"""
+
+import asyncio
+import base64
+import contextlib
+import contextvars
+import functools
+import hashlib
+import inspect
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+import orjson
+
+# Configurações da API
+API_BASE_URL = "https://api-analysa-production.up.railway.app"
+API_VERSION = "v1"
+
+# Limites do pool de conexões do cliente HTTP/2
+HTTP_LIMITS = httpx.Limits(max_connections=32, max_keepalive_connections=16, keepalive_expiry=75.0)
+
+# Timeouts curtos (conexão, leitura) para falhar rápido em rede instável,
+# e novas tentativas de conexão em falhas transitórias
+DEFAULT_TIMEOUT = httpx.Timeout(10.0, connect=3.0)
+HTTP_RETRIES = 3
+
+# Leitura mais longa para os scripts de upload, que esperam o OCR
+UPLOAD_TIMEOUT = httpx.Timeout(30.0, connect=3.0)
+
+# Token de acesso reaproveitado entre execuções (evita register + login)
+TOKEN_CACHE = Path.home() / ".cache" / "api_analysa" / "token.json"
+
+# IDs dos pacientes de teste já criados, por usuário e CPF
+PATIENT_CACHE = TOKEN_CACHE.parent / "patients.json"
+
+# Validadores (ETag/Last-Modified) das respostas quase estáticas (/, /health,
+# /docs, /openapi.json), por URL
+ETAG_CACHE = TOKEN_CACHE.parent / "etags.json"
+
+# Corpos guardados para responder a um 304 (ex.: o spec OpenAPI), por URL
+BODY_CACHE_DIR = TOKEN_CACHE.parent / "bodies"
+
+_client = None
+
+# Renovações de token em andamento, pelo token recusado: os testers que
+# compartilham o mesmo token aguardam uma única reautenticação
+_token_refreshes = {}
+
+
+def _load_json(path):
+    """Carrega um cache JSON salvo em disco ({} se não existir ou estiver corrompido)."""
+    try:
+        return json.loads(path.read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_bytes(path, data):
+    """Grava um arquivo de cache de forma atômica (arquivo temporário + os.replace)."""
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, path)
+    except OSError:
+        pass
+
+
+def _save_json(path, data):
+    """Grava um cache JSON de forma atômica."""
+    _save_bytes(path, json.dumps(data).encode())
+
+
+_patient_ids = _load_json(PATIENT_CACHE)
+_etags = _load_json(ETAG_CACHE)
+
+
+def create_client(base_url=API_BASE_URL, timeout=DEFAULT_TIMEOUT):
+    """Cria o cliente HTTP/2: todas as requisições compartilham uma conexão TLS."""
+    return httpx.AsyncClient(
+        base_url=base_url,
+        timeout=timeout,
+        transport=httpx.AsyncHTTPTransport(
+            http2=True,
+            limits=HTTP_LIMITS,
+            retries=HTTP_RETRIES
+        )
+    )
+
+
+def get_client():
+    """
+    Retorna o cliente HTTP compartilhado, criando-o na primeira chamada.
+    
+    Todos os testers do processo usam o mesmo pool de conexões, então o
+    handshake TLS com a API acontece uma única vez.
+    """
+    global _client
+    if _client is None or _client.is_closed:
+        _client = create_client()
+    return _client
+
+
+async def prewarm(client):
+    """
+    Abre a conexão TLS com um HEAD / descartável, em segundo plano.
+    
+    Enquanto o handshake acontece o script segue preparando os dados; a
+    primeira requisição real reaproveita a conexão já estabelecida.
+    """
+    try:
+        await client.head("/")
+    except httpx.HTTPError:
+        pass
+
+
+async def read_head(response, limit=512):
+    """
+    Lê apenas os primeiros bytes do corpo de uma resposta em streaming.
+    
+    O restante não é baixado: o stream é fechado logo em seguida, liberando
+    a conexão para as próximas requisições.
+    """
+    head = b""
+    async for chunk in response.aiter_bytes():
+        head += chunk
+        if len(head) >= limit:
+            break
+    await response.aclose()
+    return head[:limit].decode("utf-8", "replace")
+
+
+def _body_path(url):
+    """Arquivo com o corpo guardado de uma URL."""
+    return BODY_CACHE_DIR / f"{hashlib.sha256(url.encode()).hexdigest()}.body"
+
+
+async def conditional_get(client, url, keep_body=False):
+    """
+    GET condicional: envia os validadores (ETag/Last-Modified) salvos da
+    última resposta 200 e, num 304, o corpo não é transferido de novo.
+    
+    Args:
+        client: Cliente HTTP
+        url: URL absoluta ou relativa ao base_url do cliente
+        keep_body: Guarda o corpo da resposta 200 em disco, para devolvê-lo
+            num 304 (só envia os validadores se o corpo estiver guardado)
+        
+    Returns:
+        Tupla (response, body): body é o corpo da resposta 200 ou, num 304
+        com keep_body, o corpo guardado; None nos demais casos
+    """
+    key = str(client.base_url.join(url))
+    body_path = _body_path(key)
+    validators = _etags.get(key)
+    headers = {}
+    if isinstance(validators, dict) and (not keep_body or body_path.exists()):
+        if validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators.get("last_modified"):
+            headers["If-Modified-Since"] = validators["last_modified"]
+    
+    response = await send(client, "GET", url, headers)
+    if response.status_code == 304:
+        return response, body_path.read_bytes() if keep_body else None
+    if response.status_code != 200:
+        return response, None
+    
+    validators = {
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+    }
+    if any(validators.values()):
+        if keep_body:
+            _save_bytes(body_path, response.content)
+        if _etags.get(key) != validators:
+            _etags[key] = validators
+            _save_json(ETAG_CACHE, _etags)
+    return response, response.content
+
+
+async def send(client, method, url, headers=None, **kwargs):
+    """
+    Envia uma requisição serializando o corpo json= com orjson.
+    
+    O httpx usa o json da stdlib; aqui o payload vira bytes com orjson e
+    segue como content=, com o Content-Type correspondente.
+    """
+    if "json" in kwargs:
+        kwargs["content"] = orjson.dumps(kwargs.pop("json"))
+        headers = {**(headers or {}), "Content-Type": "application/json"}
+    return await client.request(method, url, headers=headers, **kwargs)
+
+
+async def close_client():
+    """Fecha o cliente compartilhado (chamar uma vez, ao final da execução)."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def _jwt_exp(token):
+    """Lê o claim exp de um JWT (sem validar a assinatura), ou None."""
+    try:
+        payload = token.split(".")[1]
+        claims = json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+        return claims.get("exp")
+    except (IndexError, ValueError, AttributeError):
+        return None
+
+
+def load_cached_token(email, min_ttl=30):
+    """
+    Retorna o token salvo em disco para o usuário, se ainda for válido por
+    pelo menos min_ttl segundos.
+    """
+    cached = _load_json(TOKEN_CACHE)
+    if cached.get("email") == email and cached.get("exp", 0) > time.time() + min_ttl:
+        return cached.get("token")
+    return None
+
+
+def save_cached_token(token, email):
+    """Salva o token (e a expiração lida do JWT) de forma atômica."""
+    exp = _jwt_exp(token)
+    if not exp:
+        return
+    _save_json(TOKEN_CACHE, {"token": token, "email": email, "exp": exp})
+
+
+def invalidate_cached_token(email):
+    """
+    Descarta o token salvo (ex.: após um 401), se ele pertencer ao usuário.
+    
+    O cache é compartilhado entre os scripts: um 401 com o token de outro
+    usuário não apaga o token salvo.
+    """
+    if _load_json(TOKEN_CACHE).get("email") != email:
+        return
+    try:
+        TOKEN_CACHE.unlink()
+    except FileNotFoundError:
+        pass
+
+
+def _find_patient(listing, patient):
+    """Procura, na resposta da listagem de pacientes, o paciente com o mesmo CPF."""
+    items = listing.get("patients", []) if isinstance(listing, dict) else listing
+    for item in items or []:
+        if item.get("cpf") == patient["cpf"]:
+            return item.get("id")
+    return None
+
+
+async def get_or_create_patient(request, base_url, user_email, patient):
+    """
+    Retorna o ID do paciente de teste, criando-o só se ainda não existir.
+    
+    O CPF é fixo, então o mesmo paciente serve a todas as execuções: o ID
+    fica salvo em disco por usuário. Se a API recusar a criação por
+    duplicidade (409), o ID é resolvido com uma única listagem.
+    
+    Args:
+        request: Corrotina (method, url, **kwargs) que envia a requisição autenticada
+        base_url: URL base da API versionada
+        user_email: Email do usuário de teste (dono do paciente)
+        patient: Dados do paciente
+        
+    Returns:
+        Tupla (patient_id, origem), onde origem é "cache", "created" ou
+        "existing"; (None, status_code) em caso de falha
+    """
+    key = f"{user_email}:{patient['cpf']}"
+    if key in _patient_ids:
+        return _patient_ids[key], "cache"
+    
+    response = await request("POST", f"{base_url}/patients/", json=patient)
+    if response.status_code in [200, 201]:
+        patient_id, origin = orjson.loads(response.content).get("id"), "created"
+    elif response.status_code == 409:
+        response = await request("GET", f"{base_url}/patients/", params={"email": patient["email"]})
+        if response.status_code != 200:
+            return None, response.status_code
+        patient_id, origin = _find_patient(orjson.loads(response.content), patient), "existing"
+    else:
+        return None, response.status_code
+    
+    if patient_id:
+        _patient_ids[key] = patient_id
+        _save_json(PATIENT_CACHE, _patient_ids)
+    return patient_id, origin
+
+
+class BaseAPITester:
+    """
+    Base dos testers da API: autenticação, paciente de teste, registro dos
+    resultados e resumo.
+    
+    As subclasses definem o usuário e o paciente de teste e listam seus
+    testes em public_tests() (não exigem token) e authenticated_tests().
+    """
+    TITLE = "🧪 TESTANDO A API ANALYSA"
+    SUMMARY_TITLE = "📊 RESUMO DOS TESTES"
+    TEST_USER = {}
+    TEST_PATIENT = {}
+    
+    def __init__(self, session):
+        self.base_url = f"{API_BASE_URL}/api/{API_VERSION}"
+        # Cliente HTTP compartilhado: o token fica em self.headers, por tester
+        self.session = session
+        self.headers = {}
+        self.auth_token = None
+        self.test_results = []
+    
+    def log_test(self, test_name: str, success: bool, details: str = ""):
+        """Registra resultado do teste"""
+        status = "✅ PASS" if success else "❌ FAIL"
+        print(f"{status} {test_name}")
+        if details:
+            print(f"   📝 {details}")
+        
+        self.test_results.append({
+            "test": test_name,
+            "success": success,
+            "details": details
+        })
+    
+    def _set_token(self, token: str):
+        """Guarda o token e o envia nas próximas requisições deste tester"""
+        self.auth_token = token
+        self.headers["Authorization"] = f"Bearer {token}"
+    
+    async def _reauthenticate(self):
+        """Descarta o token em cache e autentica novamente pela rede, retornando o novo token"""
+        invalidate_cached_token(self.TEST_USER["email"])
+        if await self.authenticate(use_cache=False):
+            return self.auth_token
+        return None
+    
+    async def _renew_token(self, stale_token):
+        """
+        Substitui um token recusado pela API, retornando o novo (ou None).
+        
+        A renovação é compartilhada por token recusado: as requisições e os
+        testers concorrentes que usavam o mesmo token aguardam uma única
+        reautenticação. Um token que expire depois gera uma nova renovação.
+        """
+        if self.auth_token != stale_token:
+            return self.auth_token
+        
+        refresh = _token_refreshes.get(stale_token)
+        if refresh is None:
+            refresh = _token_refreshes[stale_token] = asyncio.ensure_future(self._reauthenticate())
+        new_token = await refresh
+        if new_token:
+            self._set_token(new_token)
+        return new_token
+    
+    async def _request(self, method: str, url: str, **kwargs):
+        """
+        Envia uma requisição com o token do tester.
+        
+        Se a API responder 401 com um token (possivelmente vindo do cache),
+        renova o token (uma vez por token recusado) e repete a requisição.
+        """
+        token = self.auth_token
+        response = await send(self.session, method, url, self.headers, **kwargs)
+        if response.status_code != 401 or not token:
+            return response
+        
+        if not await self._renew_token(token):
+            return response
+        return await send(self.session, method, url, self.headers, **kwargs)
+    
+    async def authenticate(self, use_cache: bool = True) -> bool:
+        """Autentica na API (registro + login), reaproveitando o token em cache"""
+        email = self.TEST_USER["email"]
+        
+        # Reaproveita o token salvo em disco enquanto ele não expira
+        cached_token = load_cached_token(email) if use_cache else None
+        if cached_token:
+            self._set_token(cached_token)
+            self.log_test("Authentication", True, "Token reaproveitado do cache")
+            return True
+        
+        try:
+            # Tentar registro (409 = usuário já existe)
+            response = await send(self.session, "POST", f"{self.base_url}/auth/register", json=self.TEST_USER)
+            if response.status_code not in [200, 201, 409]:
+                self.log_test("Authentication", False, f"Registro falhou: {response.status_code}")
+                return False
+            
+            # Fazer login
+            login_data = {
+                "email": email,
+                "password": self.TEST_USER["password"]
+            }
+            
+            response = await send(self.session, "POST", f"{self.base_url}/auth/login", json=login_data)
+            if response.status_code == 200:
+                data = orjson.loads(response.content)
+                self._set_token(data.get("access_token"))
+                save_cached_token(self.auth_token, email)
+                self.log_test("Authentication", True, "Token obtido com sucesso")
+                return True
+            else:
+                self.log_test("Authentication", False, f"Login falhou: {response.status_code}")
+                return False
+                
+        except Exception as e:
+            self.log_test("Authentication", False, f"Erro: {str(e)}")
+            return False
+    
+    async def ensure_patient(self):
+        """Obtém (ou cria) o paciente de teste, retornando seu ID"""
+        try:
+            patient_id, origin = await get_or_create_patient(
+                self._request, self.base_url, self.TEST_USER["email"], self.TEST_PATIENT
+            )
+            if patient_id:
+                messages = {
+                    "cache": "Paciente reaproveitado do cache",
+                    "created": "Paciente criado",
+                    "existing": "Paciente já existente",
+                }
+                self.log_test("Create Test Patient", True, f"{messages[origin]}: {patient_id}")
+                return patient_id
+            else:
+                self.log_test("Create Test Patient", False, f"Status: {origin}")
+                return None
+                
+        except Exception as e:
+            self.log_test("Create Test Patient", False, f"Erro: {str(e)}")
+            return None
+    
+    async def _conditional_get(self, url: str):
+        """GET condicional (ver conditional_get): num 304 o corpo não é transferido de novo."""
+        response, _ = await conditional_get(self.session, url)
+        return response
+    
+    def public_tests(self):
+        """Testes que não dependem de autenticação"""
+        return []
+    
+    def authenticated_tests(self, patient_id):
+        """Testes que dependem do token e do paciente de teste"""
+        return []
+    
+    async def _run_authenticated_tests(self):
+        """Autentica, garante o paciente e roda concorrentemente os testes dependentes"""
+        if not await self.authenticate():
+            print("❌ Falha na autenticação. Pulando testes autenticados.")
+            return
+        
+        patient_id = await self.ensure_patient()
+        if not patient_id:
+            print("❌ Falha ao criar paciente. Pulando testes autenticados.")
+            return
+        
+        await asyncio.gather(*self.authenticated_tests(patient_id))
+    
+    def summary(self) -> bool:
+        """Exibe o resumo dos resultados e retorna se todos passaram"""
+        print("\n" + "=" * 60)
+        print(self.SUMMARY_TITLE)
+        print("=" * 60)
+        
+        total_tests = len(self.test_results)
+        passed_tests = sum(1 for result in self.test_results if result["success"])
+        failed_tests = total_tests - passed_tests
+        
+        print(f"Total de Testes: {total_tests}")
+        print(f"✅ Passou: {passed_tests}")
+        print(f"❌ Falhou: {failed_tests}")
+        print(f"📈 Taxa de Sucesso: {(passed_tests/total_tests)*100:.1f}%")
+        
+        if failed_tests > 0:
+            print("\n❌ TESTES QUE FALHARAM:")
+            for result in self.test_results:
+                if not result["success"]:
+                    print(f"  - {result['test']}: {result['details']}")
+        
+        print(f"\n🌐 URL da API: {API_BASE_URL}")
+        print(f"📚 Documentação: {API_BASE_URL}/docs")
+        
+        return passed_tests == total_tests
+    
+    async def run_all_tests(self) -> bool:
+        """
+        Executa todos os testes.
+        
+        Os testes públicos rodam concorrentemente com a cadeia autenticação →
+        paciente → testes autenticados, que por sua vez também são concorrentes.
+        """
+        print(self.TITLE)
+        print("=" * 60)
+        
+        # Não há endpoint de lote na API: as requisições independentes já são
+        # multiplexadas como streams HTTP/2 na mesma conexão, saindo juntas
+        await asyncio.gather(*self.public_tests(), self._run_authenticated_tests())
+        
+        return self.summary()
+
+
+@functools.lru_cache(maxsize=1)
+def load_routers():
+    """
+    Importa os routers de auth, patients e exams uma única vez por processo.
+    
+    A importação dos routers constrói os modelos Pydantic das rotas, a parte
+    mais cara do carregamento da aplicação; os scripts que inspecionam as
+    rotas compartilham o resultado. Se algum módulo já tiver sido importado
+    por outro caminho, o import abaixo só o busca em sys.modules, sem
+    reexecutá-lo. Requer o diretório src no sys.path.
+    
+    Returns:
+        Tupla (auth_router, patients_router, exams_router)
+    """
+    from api.auth import router as auth_router
+    from api.patients import router as patients_router
+    from api.exams import router as exams_router
+    return auth_router, patients_router, exams_router
+
+
+def run_buffered(test, *args):
+    """
+    Executa um teste acumulando o que ele imprime num StringIO e escreve a
+    saída de uma vez no stdout (um write por teste em vez de um por print).
+    """
+    buffer = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(buffer):
+            return test(*args)
+    finally:
+        sys.stdout.write(buffer.getvalue())
+
+
+# Buffer de saída do teste em execução (cada tarefa do gather tem o seu)
+_output = contextvars.ContextVar("_output", default=None)
+
+
+class ContextStdout(io.TextIOBase):
+    """Encaminha o stdout para o buffer do teste em execução, se houver um."""
+    
+    def __init__(self, stream):
+        self._stream = stream
+    
+    def write(self, text):
+        return (_output.get() or self._stream).write(text)
+    
+    def flush(self):
+        self._stream.flush()
+
+
+async def run_captured(test):
+    """
+    Executa um teste guardando o que ele imprime num StringIO.
+    
+    Funções síncronas rodam numa thread; asyncio.to_thread propaga o
+    contexto, então o buffer do teste vale também dentro dela.
+    
+    Returns:
+        Tupla (resultado ou exceção, saída do teste)
+    """
+    buffer = io.StringIO()
+    _output.set(buffer)
+    try:
+        if inspect.iscoroutinefunction(test):
+            result = await test()
+        else:
+            result = await asyncio.to_thread(test)
+    except Exception as e:
+        result = e
+    return result, buffer.getvalue()
+
+
+# Raiz do projeto, onde ficam o pyproject e os arquivos .coverage.*
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+
+def run_test_file(test_file):
+    """
+    Executa pytest em um único arquivo de teste, coletando cobertura.
+    
+    Cada execução grava seu próprio .coverage.<arquivo>, combinado depois em
+    report_coverage(). O addopts do pyproject é mantido; só os relatórios
+    HTML e XML de cada execução vão para um diretório temporário, para que
+    as execuções concorrentes não disputem htmlcov/ e coverage.xml.
+    """
+    env = dict(os.environ, COVERAGE_FILE=f".coverage.{Path(test_file).stem}")
+    with tempfile.TemporaryDirectory() as reports_dir:
+        return subprocess.run(
+            [
+                sys.executable, "-m", "pytest", test_file, "-v", "--tb=short",
+                f"--cov-report=html:{reports_dir}/html",
+                f"--cov-report=xml:{reports_dir}/coverage.xml",
+            ],
+            capture_output=True,
+            text=True,
+            cwd=REPO_ROOT,
+            env=env
+        )
+
+
+def report_coverage():
+    """Combina a cobertura coletada por run_test_file() e exibe o relatório."""
+    print("\n📈 Relatório de cobertura...")
+    print("=" * 60)
+    
+    try:
+        # Apenas consolida os arquivos .coverage.*, sem reexecutar os testes
+        combine = subprocess.run([sys.executable, "-m", "coverage", "combine"], cwd=REPO_ROOT)
+        if combine.returncode != 0:
+            return False
+        
+        result = subprocess.run([sys.executable, "-m", "coverage", "report", "-m"], cwd=REPO_ROOT)
+        return result.returncode == 0
+        
+    except Exception as e:
+        print(f"❌ Erro ao gerar cobertura: {e}")
+        return False
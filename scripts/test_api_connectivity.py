@@ -3,90 +3,118 @@
 Script para testar conectividade básica da API Analysa
 """
 
-import requests
+import asyncio
 import json
 
-# Configurações da API
-API_BASE_URL = "https://api-analysa-production.up.railway.app"
+from _common import conditional_get, create_client, read_head
 
-def test_api_connectivity():
-    """Testa conectividade básica da API"""
-    print("🔍 Testando conectividade da API Analysa")
-    print("=" * 50)
-    
-    # Teste 1: Health check básico
+async def probe_root(client):
+    """Teste 1: Health check básico"""
+    lines = ["1️⃣ Testando endpoint raiz..."]
     try:
-        print("1️⃣ Testando endpoint raiz...")
-        response = requests.get(f"{API_BASE_URL}/")
-        print(f"   Status: {response.status_code}")
-        if response.status_code == 200:
-            print("   ✅ API respondendo")
-        else:
-            print(f"   ⚠️  Resposta inesperada: {response.text[:100]}")
+        async with client.stream("GET", "/") as response:
+            lines.append(f"   Status: {response.status_code}")
+            if response.status_code == 200:
+                lines.append("   ✅ API respondendo")
+            else:
+                lines.append(f"   ⚠️  Resposta inesperada: {await read_head(response, 100)}")
     except Exception as e:
-        print(f"   ❌ Erro: {str(e)}")
-    
-    # Teste 2: Documentação Swagger
+        lines.append(f"   ❌ Erro: {str(e)}")
+    return lines
+
+async def probe_docs(client):
+    """Teste 2: Documentação Swagger"""
+    lines = ["2️⃣ Testando documentação Swagger..."]
     try:
-        print("\n2️⃣ Testando documentação Swagger...")
-        response = requests.get(f"{API_BASE_URL}/docs")
-        print(f"   Status: {response.status_code}")
+        # Só o status importa: HEAD evita baixar o HTML do Swagger
+        response = await client.head("/docs")
+        lines.append(f"   Status: {response.status_code}")
         if response.status_code == 200:
-            print("   ✅ Swagger disponível")
+            lines.append("   ✅ Swagger disponível")
         else:
-            print(f"   ⚠️  Swagger não disponível: {response.status_code}")
+            lines.append(f"   ⚠️  Swagger não disponível: {response.status_code}")
     except Exception as e:
-        print(f"   ❌ Erro: {str(e)}")
-    
-    # Teste 3: OpenAPI spec
+        lines.append(f"   ❌ Erro: {str(e)}")
+    return lines
+
+async def probe_openapi(client):
+    """Teste 3: OpenAPI spec"""
+    lines = ["3️⃣ Testando OpenAPI spec..."]
     try:
-        print("\n3️⃣ Testando OpenAPI spec...")
-        response = requests.get(f"{API_BASE_URL}/openapi.json")
-        print(f"   Status: {response.status_code}")
-        if response.status_code == 200:
-            print("   ✅ OpenAPI spec disponível")
+        # O spec só muda a cada deploy: revalidado por ETag/Last-Modified,
+        # com o corpo guardado no cache compartilhado dos scripts
+        response, body = await conditional_get(client, "/openapi.json", keep_body=True)
+        lines.append(f"   Status: {response.status_code}")
+        if response.status_code in (200, 304):
+            if response.status_code == 304:
+                # Spec inalterado desde o último download: lido do disco
+                lines.append("   ✅ OpenAPI spec disponível (cache local)")
+            else:
+                lines.append("   ✅ OpenAPI spec disponível")
             # Verifica endpoints disponíveis
             try:
-                spec = response.json()
+                spec = json.loads(body)
                 paths = spec.get("paths", {})
-                print(f"   📋 Endpoints disponíveis: {len(paths)}")
+                lines.append(f"   📋 Endpoints disponíveis: {len(paths)}")
                 for path in list(paths.keys())[:10]:  # Mostra os primeiros 10
-                    print(f"      - {path}")
+                    lines.append(f"      - {path}")
                 if len(paths) > 10:
-                    print(f"      ... e mais {len(paths) - 10} endpoints")
+                    lines.append(f"      ... e mais {len(paths) - 10} endpoints")
             except:
-                print("   ⚠️  Não foi possível parsear o spec")
+                lines.append("   ⚠️  Não foi possível parsear o spec")
         else:
-            print(f"   ⚠️  OpenAPI spec não disponível: {response.status_code}")
+            lines.append(f"   ⚠️  OpenAPI spec não disponível: {response.status_code}")
     except Exception as e:
-        print(f"   ❌ Erro: {str(e)}")
-    
-    # Teste 4: Endpoint de auth register
+        lines.append(f"   ❌ Erro: {str(e)}")
+    return lines
+
+async def probe_register(client):
+    """Teste 4: Endpoint de auth register"""
+    lines = ["4️⃣ Testando endpoint de registro..."]
     try:
-        print("\n4️⃣ Testando endpoint de registro...")
-        response = requests.post(f"{API_BASE_URL}/api/v1/auth/register", json={})
-        print(f"   Status: {response.status_code}")
+        # Só o status importa: o corpo da resposta não é lido
+        async with client.stream("POST", "/api/v1/auth/register", json={}) as response:
+            pass
+        lines.append(f"   Status: {response.status_code}")
         if response.status_code in [422, 400]:  # 422 = Validation Error (endpoint existe)
-            print("   ✅ Endpoint de registro disponível")
+            lines.append("   ✅ Endpoint de registro disponível")
         else:
-            print(f"   ⚠️  Endpoint de registro não disponível: {response.status_code}")
+            lines.append(f"   ⚠️  Endpoint de registro não disponível: {response.status_code}")
     except Exception as e:
-        print(f"   ❌ Erro: {str(e)}")
-    
-    # Teste 5: Endpoint de upload de exames
+        lines.append(f"   ❌ Erro: {str(e)}")
+    return lines
+
+async def probe_upload(client):
+    """Teste 5: Endpoint de upload de exames"""
+    lines = ["5️⃣ Testando endpoint de upload de exames..."]
     try:
-        print("\n5️⃣ Testando endpoint de upload de exames...")
-        response = requests.post(f"{API_BASE_URL}/api/v1/exams/upload", data={})
-        print(f"   Status: {response.status_code}")
+        async with client.stream("POST", "/api/v1/exams/upload", data={}) as response:
+            pass
+        lines.append(f"   Status: {response.status_code}")
         if response.status_code in [422, 400, 401]:  # 422 = Validation Error (endpoint existe)
-            print("   ✅ Endpoint de upload disponível")
+            lines.append("   ✅ Endpoint de upload disponível")
         else:
-            print(f"   ⚠️  Endpoint de upload não disponível: {response.status_code}")
+            lines.append(f"   ⚠️  Endpoint de upload não disponível: {response.status_code}")
     except Exception as e:
-        print(f"   ❌ Erro: {str(e)}")
+        lines.append(f"   ❌ Erro: {str(e)}")
+    return lines
+
+PROBES = [probe_root, probe_docs, probe_openapi, probe_register, probe_upload]
+
+async def test_api_connectivity():
+    """Testa conectividade básica da API"""
+    print("🔍 Testando conectividade da API Analysa")
+    print("=" * 50)
+    
+    # As sondagens são independentes: com HTTP/2 todas são multiplexadas na
+    # mesma conexão, e os resultados são exibidos na ordem original
+    async with create_client() as client:
+        results = await asyncio.gather(*(probe(client) for probe in PROBES))
+    
+    print("\n\n".join("\n".join(lines) for lines in results))
     
     print("\n" + "=" * 50)
     print("🏁 Teste de conectividade concluído")
 
 if __name__ == "__main__":
-    test_api_connectivity()
+    asyncio.run(test_api_connectivity())
@@ -3,18 +3,27 @@
 Script para testar detalhadamente o endpoint de autenticação
 """
 
-import requests
-import json
+import asyncio
+import orjson
 import time
 
-# Configurações da API
-API_BASE_URL = "https://api-analysa-production.up.railway.app"
+from _common import create_client, prewarm
 
-def test_auth_detailed():
+async def test_auth_detailed():
     """Testa detalhadamente o endpoint de autenticação"""
     print("🔍 Teste Detalhado de Autenticação")
     print("=" * 50)
     
+    async with create_client() as client:
+        warmup = asyncio.create_task(prewarm(client))
+        await _run_auth_tests(client)
+        await warmup
+    
+    print("\n" + "=" * 50)
+    print("🏁 Teste de autenticação detalhado concluído")
+
+async def _run_auth_tests(client):
+    """Executa os testes de autenticação usando um único cliente HTTP."""
     # Teste 1: Dados válidos
     try:
         print("1️⃣ Testando registro com dados válidos...")
@@ -32,19 +41,19 @@ def test_auth_detailed():
         print(f"   📧 Email: {test_user['email']}")
         print(f"   🆔 CRM: {test_user['crm']}")
         
-        response = requests.post(f"{API_BASE_URL}/api/v1/auth/register", json=test_user)
+        response = await client.post("/api/v1/auth/register", json=test_user)
         print(f"   Status: {response.status_code}")
         print(f"   Response: {response.text[:200]}")
         
         if response.status_code == 201:
             print("   ✅ Registro bem-sucedido!")
-            data = response.json()
+            data = orjson.loads(response.content)
             print(f"   🆔 User ID: {data.get('user_id', 'N/A')}")
         elif response.status_code == 422:
             print("   ⚠️  Erro de validação (esperado para teste)")
             try:
-                errors = response.json()
-                print(f"   📋 Detalhes: {json.dumps(errors, indent=2)}")
+                errors = orjson.loads(response.content)
+                print(f"   📋 Detalhes: {orjson.dumps(errors, option=orjson.OPT_INDENT_2).decode()}")
             except:
                 print(f"   📋 Detalhes: {response.text}")
         elif response.status_code == 500:
@@ -63,14 +72,14 @@ def test_auth_detailed():
             "email": "invalid@example.com"
         }
         
-        response = requests.post(f"{API_BASE_URL}/api/v1/auth/register", json=invalid_user)
+        response = await client.post("/api/v1/auth/register", json=invalid_user)
         print(f"   Status: {response.status_code}")
         
         if response.status_code == 422:
             print("   ✅ Validação funcionando (esperado)")
             try:
-                errors = response.json()
-                print(f"   📋 Erros: {json.dumps(errors, indent=2)}")
+                errors = orjson.loads(response.content)
+                print(f"   📋 Erros: {orjson.dumps(errors, option=orjson.OPT_INDENT_2).decode()}")
             except:
                 print(f"   📋 Erros: {response.text}")
         else:
@@ -88,12 +97,12 @@ def test_auth_detailed():
                 "password": test_user["password"]
             }
             
-            response = requests.post(f"{API_BASE_URL}/api/v1/auth/login", json=login_data)
+            response = await client.post("/api/v1/auth/login", json=login_data)
             print(f"   Status: {response.status_code}")
             
             if response.status_code == 200:
                 print("   ✅ Login bem-sucedido!")
-                data = response.json()
+                data = orjson.loads(response.content)
                 token = data.get("access_token", "")
                 if token:
                     print(f"   🔑 Token obtido: {token[:20]}...")
@@ -105,9 +114,6 @@ def test_auth_detailed():
                 
     except Exception as e:
         print(f"   ❌ Erro: {str(e)}")
-    
-    print("\n" + "=" * 50)
-    print("🏁 Teste de autenticação detalhado concluído")
 
 if __name__ == "__main__":
-    test_auth_detailed()
+    asyncio.run(test_auth_detailed())
@@ -6,11 +6,13 @@ Script simples para testar Swagger/OpenAPI básico.
 from fastapi import FastAPI
 from fastapi.openapi.utils import get_openapi
 
-def test_basic_swagger():
-    """Testa funcionalidade básica do Swagger."""
-    print("🔍 Testando Swagger/OpenAPI básico...")
+def _build_app():
+    """
+    Cria a aplicação FastAPI de teste com a configuração do Swagger.
     
-    # Cria aplicação de teste
+    Registra de uma vez as rotas usadas pelos dois testes, que compartilham
+    a mesma instância (e o mesmo schema OpenAPI memorizado).
+    """
     app = FastAPI(
         title="API de Exames Médicos",
         version="1.0.0",
@@ -19,7 +21,7 @@ def test_basic_swagger():
         redoc_url="/redoc"
     )
     
-    # Adiciona algumas rotas de teste
+    # Rotas básicas
     @app.get("/")
     async def root():
         return {"message": "API funcionando"}
@@ -32,50 +34,7 @@ def test_basic_swagger():
     async def test():
         return {"test": "success"}
     
-    # Verifica configuração
-    print(f"✅ Título: {app.title}")
-    print(f"✅ Versão: {app.version}")
-    print(f"✅ Swagger UI: {app.docs_url}")
-    print(f"✅ ReDoc: {app.redoc_url}")
-    print(f"✅ Rotas: {len(app.routes)}")
-    
-    # Gera OpenAPI schema
-    openapi_schema = get_openapi(
-        title=app.title,
-        version=app.version,
-        description=app.description,
-        routes=app.routes,
-    )
-    
-    print("✅ OpenAPI schema gerado:")
-    print(f"   - Info: {openapi_schema['info']}")
-    print(f"   - Paths: {list(openapi_schema['paths'].keys())}")
-    
-    # Verifica se as rotas estão documentadas
-    paths = openapi_schema['paths']
-    for route in app.routes:
-        if hasattr(route, 'path'):
-            path = route.path
-            if path in paths:
-                print(f"✅ Rota {path} documentada")
-            else:
-                print(f"⚠️ Rota {path} não documentada")
-    
-    return True
-
-def test_swagger_features():
-    """Testa recursos específicos do Swagger."""
-    print("\n🚀 Testando recursos do Swagger...")
-    
-    app = FastAPI(
-        title="API de Exames Médicos",
-        version="1.0.0",
-        description="API para processamento de exames médicos via OCR com LGPD compliance",
-        docs_url="/docs",
-        redoc_url="/redoc"
-    )
-    
-    # Adiciona rota com parâmetros
+    # Rota com parâmetros
     @app.get("/api/users/{user_id}")
     async def get_user(user_id: int, include_details: bool = False):
         """
@@ -90,7 +49,7 @@ def test_swagger_features():
         """
         return {"user_id": user_id, "include_details": include_details}
     
-    # Adiciona rota POST
+    # Rota POST
     @app.post("/api/users")
     async def create_user(name: str, email: str):
         """
@@ -105,13 +64,60 @@ def test_swagger_features():
         """
         return {"name": name, "email": email, "created": True}
     
+    return app
+
+def get_openapi_schema(app):
+    """
+    Retorna o schema OpenAPI da aplicação, gerando-o apenas uma vez.
+    
+    O schema fica memorizado em app.openapi_schema (o mesmo cache usado por
+    app.openapi()), evitando percorrer as rotas novamente a cada chamada.
+    """
+    if app.openapi_schema is None:
+        app.openapi_schema = get_openapi(
+            title=app.title,
+            version=app.version,
+            description=app.description,
+            routes=app.routes,
+        )
+    return app.openapi_schema
+
+def test_basic_swagger(app):
+    """Testa funcionalidade básica do Swagger."""
+    print("🔍 Testando Swagger/OpenAPI básico...")
+    
+    # Verifica configuração
+    print(f"✅ Título: {app.title}")
+    print(f"✅ Versão: {app.version}")
+    print(f"✅ Swagger UI: {app.docs_url}")
+    print(f"✅ ReDoc: {app.redoc_url}")
+    print(f"✅ Rotas: {len(app.routes)}")
+    
+    # Gera OpenAPI schema
+    openapi_schema = get_openapi_schema(app)
+    
+    print("✅ OpenAPI schema gerado:")
+    print(f"   - Info: {openapi_schema['info']}")
+    print(f"   - Paths: {list(openapi_schema['paths'].keys())}")
+    
+    # Verifica se as rotas estão documentadas
+    paths = openapi_schema['paths']
+    for route in app.routes:
+        if hasattr(route, 'path'):
+            path = route.path
+            if path in paths:
+                print(f"✅ Rota {path} documentada")
+            else:
+                print(f"⚠️ Rota {path} não documentada")
+    
+    return True
+
+def test_swagger_features(app):
+    """Testa recursos específicos do Swagger."""
+    print("\n🚀 Testando recursos do Swagger...")
+    
     # Gera schema
-    openapi_schema = get_openapi(
-        title=app.title,
-        version=app.version,
-        description=app.description,
-        routes=app.routes,
-    )
+    openapi_schema = get_openapi_schema(app)
     
     print("✅ Rotas com parâmetros documentadas:")
     for path, methods in openapi_schema['paths'].items():
@@ -126,11 +132,14 @@ def main():
     print("🚀 Teste de Swagger/OpenAPI")
     print("=" * 40)
     
+    # Uma única aplicação (e um único schema) para os dois testes
+    app = _build_app()
+    
     # Testa funcionalidade básica
-    basic_ok = test_basic_swagger()
+    basic_ok = test_basic_swagger(app)
     
     # Testa recursos específicos
-    features_ok = test_swagger_features()
+    features_ok = test_swagger_features(app)
     
     # Resumo
     print("\n" + "=" * 40)
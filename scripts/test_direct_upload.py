@@ -3,19 +3,27 @@
 Script para testar upload direto usando credenciais Supabase
 """
 
-import requests
+import asyncio
 import json
 import time
 from pathlib import Path
 
-# Configurações da API
-API_BASE_URL = "https://api-analysa-production.up.railway.app"
+from _common import UPLOAD_TIMEOUT, create_client, prewarm, read_head
 
-def test_direct_upload():
+async def test_direct_upload():
     """Testa upload direto sem autenticação completa"""
     print("🔍 Teste de Upload Direto")
     print("=" * 50)
     
+    async with create_client(timeout=UPLOAD_TIMEOUT) as client:
+        warmup = asyncio.create_task(prewarm(client))
+        try:
+            return await _run_upload_tests(client)
+        finally:
+            await warmup
+
+async def _run_upload_tests(client):
+    """Executa os testes de upload usando um único cliente HTTP."""
     # Verifica se o arquivo existe
     exam_file_path = Path("Exames Dr. Julio.pdf")
     if not exam_file_path.exists():
@@ -30,30 +38,30 @@ def test_direct_upload():
     try:
         print("\n1️⃣ Testando upload sem autenticação...")
         
-        files = {
-            'file': ('Exames Dr. Julio.pdf', open(exam_file_path, 'rb'), 'application/pdf')
-        }
-        
         data = {
             'patient_id': 'test_patient_123',
             'user_id': 'test_user_123'
         }
         
-        response = requests.post(
-            f"{API_BASE_URL}/api/v1/exams/upload",
-            files=files,
-            data=data
-        )
-        
-        print(f"   Status: {response.status_code}")
-        if response.status_code == 401:
-            print("   ✅ Autenticação requerida (esperado)")
-        elif response.status_code == 422:
-            print("   ⚠️  Erro de validação")
-            print(f"   📋 Response: {response.text[:200]}")
-        else:
-            print(f"   ⚠️  Status inesperado: {response.status_code}")
-            print(f"   📋 Response: {response.text[:200]}")
+        # O httpx lê o arquivo em blocos durante o envio (sem carregá-lo
+        # inteiro em memória) e o with garante que o descritor seja fechado
+        with exam_file_path.open('rb') as fh:
+            files = {'file': ('Exames Dr. Julio.pdf', fh, 'application/pdf')}
+            async with client.stream(
+                "POST",
+                "/api/v1/exams/upload",
+                files=files,
+                data=data
+            ) as response:
+                print(f"   Status: {response.status_code}")
+                if response.status_code == 401:
+                    print("   ✅ Autenticação requerida (esperado)")
+                elif response.status_code == 422:
+                    print("   ⚠️  Erro de validação")
+                    print(f"   📋 Response: {await read_head(response, 200)}")
+                else:
+                    print(f"   ⚠️  Status inesperado: {response.status_code}")
+                    print(f"   📋 Response: {await read_head(response, 200)}")
             
     except Exception as e:
         print(f"   ❌ Erro: {str(e)}")
@@ -63,8 +71,8 @@ def test_direct_upload():
         print("\n2️⃣ Verificando endpoint de upload...")
         
         # Teste com dados mínimos
-        response = requests.post(
-            f"{API_BASE_URL}/api/v1/exams/upload",
+        response = await client.post(
+            "/api/v1/exams/upload",
             data={}
         )
         
@@ -95,8 +103,8 @@ def test_direct_upload():
         
         for login_data in test_logins:
             print(f"   🔐 Tentando: {login_data['email']}")
-            response = requests.post(
-                f"{API_BASE_URL}/api/v1/auth/login",
+            response = await client.post(
+                "/api/v1/auth/login",
                 json=login_data
             )
             
@@ -107,7 +115,7 @@ def test_direct_upload():
                 if token:
                     print(f"   🔑 Token: {token[:20]}...")
                     # Tenta fazer upload com este token
-                    return test_upload_with_token(token)
+                    return await test_upload_with_token(client, token)
                 break
             elif response.status_code == 401:
                 print(f"   ❌ Credenciais inválidas")
@@ -121,7 +129,7 @@ def test_direct_upload():
     print("🏁 Teste de upload direto concluído")
     return False
 
-def test_upload_with_token(token):
+async def test_upload_with_token(client, token):
     """Testa upload usando um token válido"""
     try:
         print("\n4️⃣ Testando upload com token válido...")
@@ -129,21 +137,19 @@ def test_upload_with_token(token):
         headers = {"Authorization": f"Bearer {token}"}
         
         exam_file_path = Path("Exames Dr. Julio.pdf")
-        files = {
-            'file': ('Exames Dr. Julio.pdf', open(exam_file_path, 'rb'), 'application/pdf')
-        }
-        
         data = {
             'patient_id': 'test_patient_123',
             'user_id': 'test_user_123'
         }
         
-        response = requests.post(
-            f"{API_BASE_URL}/api/v1/exams/upload",
-            files=files,
-            data=data,
-            headers=headers
-        )
+        with exam_file_path.open('rb') as fh:
+            files = {'file': ('Exames Dr. Julio.pdf', fh, 'application/pdf')}
+            response = await client.post(
+                "/api/v1/exams/upload",
+                files=files,
+                data=data,
+                headers=headers
+            )
         
         print(f"   Status: {response.status_code}")
         if response.status_code in [200, 201]:
@@ -163,4 +169,4 @@ def test_upload_with_token(token):
         return False
 
 if __name__ == "__main__":
-    test_direct_upload()
+    asyncio.run(test_direct_upload())
@@ -3,32 +3,87 @@
 Script para testar o deploy no Railway.
 """
 
+import contextlib
+import functools
+import io
 import json
+import re
+import shutil
 import subprocess
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+@functools.lru_cache(maxsize=None)
+def _read(path: str) -> str:
+    """Lê um arquivo de configuração uma única vez, reaproveitando o conteúdo entre as verificações."""
+    return Path(path).read_text(encoding="utf-8")
+
+# Campos obrigatórios do railway.json
+_RAILWAY_REQUIRED_FIELDS = ("build", "deploy")
+
+# Variáveis de ambiente que precisam estar documentadas no env.example
+_REQUIRED_ENV_VARS = (
+    "SUPABASE_URL",
+    "SUPABASE_ANON_KEY",
+    "SECRET_KEY",
+)
+
+# Elementos essenciais do Dockerfile, com a descrição exibida
+_DOCKERFILE_CHECKS = (
+    ("FROM python", "Base image Python"),
+    ("WORKDIR", "Diretório de trabalho"),
+    ("COPY requirements.txt", "Cópia de requirements"),
+    ("RUN pip install", "Instalação de dependências"),
+    ("COPY src/", "Cópia do código fonte"),
+    ("USER app", "Usuário não-root"),
+    ("CMD", "Comando de execução"),
+)
+
+# Dependências essenciais do requirements.txt
+_ESSENTIAL_DEPS = (
+    "fastapi",
+    "uvicorn",
+    "supabase",
+    "pytesseract",
+    "pdf2image",
+    "pydantic",
+)
+
+# Uma única varredura do conteúdo encontra todos os itens de cada lista
+_DOCKERFILE_RE = re.compile("|".join(re.escape(check) for check, _ in _DOCKERFILE_CHECKS))
+_DEPS_RE = re.compile("|".join(map(re.escape, _ESSENTIAL_DEPS)))
+
 def test_railway_cli():
     """Testa se o Railway CLI está disponível."""
     print("🚂 Testando Railway CLI...")
     
+    # Detecta o CLI no PATH sem criar um processo
+    exe = shutil.which("railway")
+    if exe is None:
+        print("❌ Railway CLI não encontrado")
+        print("   Instale com: npm install -g @railway/cli")
+        return False
+    
+    # Só executa o binário (pelo caminho já resolvido) para exibir a versão,
+    # com prazo curto: um CLI travado não pode segurar a suíte inteira
     try:
         result = subprocess.run(
-            ["railway", "--version"], 
+            [exe, "--version"], 
             capture_output=True, 
-            text=True
+            text=True,
+            timeout=3
         )
-        
-        if result.returncode == 0:
-            print(f"✅ Railway CLI disponível: {result.stdout.strip()}")
-            return True
-        else:
-            print("❌ Railway CLI não disponível")
-            print("   Instale com: npm install -g @railway/cli")
-            return False
-            
-    except FileNotFoundError:
-        print("❌ Railway CLI não encontrado")
+    except subprocess.TimeoutExpired:
+        print("❌ Railway CLI não respondeu em 3s")
+        return False
+    
+    if result.returncode == 0:
+        print(f"✅ Railway CLI disponível: {result.stdout.strip()}")
+        return True
+    else:
+        print("❌ Railway CLI não disponível")
         print("   Instale com: npm install -g @railway/cli")
         return False
 
@@ -36,19 +91,13 @@ def test_railway_config():
     """Testa configuração do Railway."""
     print("\n📋 Testando configuração do Railway...")
     
-    # Verifica railway.json
-    railway_file = Path("railway.json")
-    if not railway_file.exists():
-        print("❌ railway.json não encontrado")
-        return False
-    
+    # Verifica railway.json (abre direto: um stat a menos que exists() + open)
     try:
-        with open(railway_file) as f:
-            config = json.load(f)
+        # json.loads aceita bytes e dispensa a camada de texto do open()
+        config = json.loads(Path("railway.json").read_bytes())
         
         # Verifica campos obrigatórios
-        required_fields = ["build", "deploy"]
-        for field in required_fields:
+        for field in _RAILWAY_REQUIRED_FIELDS:
             if field not in config:
                 print(f"❌ Campo {field} ausente")
                 return False
@@ -71,6 +120,9 @@ def test_railway_config():
         
         return True
         
+    except FileNotFoundError:
+        print("❌ railway.json não encontrado")
+        return False
     except json.JSONDecodeError as e:
         print(f"❌ railway.json inválido: {e}")
         return False
@@ -79,29 +131,15 @@ def test_dockerfile():
     """Testa se o Dockerfile está configurado corretamente."""
     print("\n🐳 Testando Dockerfile...")
     
-    dockerfile = Path("Dockerfile")
-    if not dockerfile.exists():
-        print("❌ Dockerfile não encontrado")
-        return False
-    
     try:
-        with open(dockerfile) as f:
-            content = f.read()
+        content = _read("Dockerfile")
         
         # Verifica elementos essenciais
-        checks = [
-            ("FROM python", "Base image Python"),
-            ("WORKDIR", "Diretório de trabalho"),
-            ("COPY requirements.txt", "Cópia de requirements"),
-            ("RUN pip install", "Instalação de dependências"),
-            ("COPY src/", "Cópia do código fonte"),
-            ("USER app", "Usuário não-root"),
-            ("CMD", "Comando de execução")
-        ]
+        found = {m.group() for m in _DOCKERFILE_RE.finditer(content)}
         
         all_ok = True
-        for check, description in checks:
-            if check in content:
+        for check, description in _DOCKERFILE_CHECKS:
+            if check in found:
                 print(f"✅ {description}")
             else:
                 print(f"❌ {description}")
@@ -109,6 +147,9 @@ def test_dockerfile():
         
         return all_ok
         
+    except FileNotFoundError:
+        print("❌ Dockerfile não encontrado")
+        return False
     except Exception as e:
         print(f"❌ Erro ao ler Dockerfile: {e}")
         return False
@@ -117,30 +158,16 @@ def test_requirements():
     """Testa se requirements.txt está configurado."""
     print("\n📦 Testando requirements.txt...")
     
-    requirements = Path("requirements.txt")
-    if not requirements.exists():
-        print("❌ requirements.txt não encontrado")
-        return False
-    
     try:
-        with open(requirements) as f:
-            lines = f.readlines()
+        content = _read("requirements.txt")
+        lines = content.splitlines()
         
         # Verifica dependências essenciais
-        essential_deps = [
-            "fastapi",
-            "uvicorn",
-            "supabase",
-            "pytesseract",
-            "pdf2image",
-            "pydantic"
-        ]
-        
-        content = "".join(lines)
+        found = set(_DEPS_RE.findall(content))
         all_ok = True
         
-        for dep in essential_deps:
-            if dep in content:
+        for dep in _ESSENTIAL_DEPS:
+            if dep in found:
                 print(f"✅ {dep}")
             else:
                 print(f"❌ {dep}")
@@ -149,6 +176,9 @@ def test_requirements():
         print(f"📊 Total de dependências: {len(lines)}")
         return all_ok
         
+    except FileNotFoundError:
+        print("❌ requirements.txt não encontrado")
+        return False
     except Exception as e:
         print(f"❌ Erro ao ler requirements.txt: {e}")
         return False
@@ -157,15 +187,11 @@ def test_environment_vars():
     """Testa variáveis de ambiente necessárias."""
     print("\n🔧 Testando variáveis de ambiente...")
     
-    required_vars = [
-        "SUPABASE_URL",
-        "SUPABASE_ANON_KEY",
-        "SECRET_KEY"
-    ]
+    env_text = _read("env.example")
     
     all_ok = True
-    for var in required_vars:
-        if var in Path("env.example").read_text():
+    for var in _REQUIRED_ENV_VARS:
+        if var in env_text:
             print(f"✅ {var} documentada")
         else:
             print(f"❌ {var} não documentada")
@@ -177,14 +203,8 @@ def test_health_endpoint():
     """Testa se o endpoint de health está configurado."""
     print("\n🏥 Testando endpoint de health...")
     
-    main_file = Path("src/main.py")
-    if not main_file.exists():
-        print("❌ main.py não encontrado")
-        return False
-    
     try:
-        with open(main_file) as f:
-            content = f.read()
+        content = _read("src/main.py")
         
         if "/health" in content and "health_check" in content:
             print("✅ Endpoint /health configurado")
@@ -193,32 +213,70 @@ def test_health_endpoint():
             print("❌ Endpoint /health não configurado")
             return False
             
+    except FileNotFoundError:
+        print("❌ main.py não encontrado")
+        return False
     except Exception as e:
         print(f"❌ Erro ao ler main.py: {e}")
         return False
 
-def main():
-    """Função principal."""
-    print("🚀 Teste de Deploy no Railway")
-    print("=" * 50)
+class _ThreadLocalStdout(io.TextIOBase):
+    """Encaminha o stdout de cada thread para o buffer dela, se houver um."""
     
-    # Testa Railway CLI
-    cli_ok = test_railway_cli()
+    def __init__(self, stream):
+        self._stream = stream
+        self._local = threading.local()
     
-    # Testa configuração
-    config_ok = test_railway_config()
+    def write(self, text):
+        buffer = getattr(self._local, "buffer", None)
+        return (buffer or self._stream).write(text)
     
-    # Testa Dockerfile
-    dockerfile_ok = test_dockerfile()
+    def flush(self):
+        self._stream.flush()
     
-    # Testa requirements
-    requirements_ok = test_requirements()
+    def capture(self, check):
+        """Executa a verificação guardando sua saída, para exibi-la sem intercalar."""
+        self._local.buffer = io.StringIO()
+        try:
+            return check(), self._local.buffer.getvalue()
+        finally:
+            self._local.buffer = None
+
+# Verificações independentes entre si, na ordem em que a saída é exibida
+CHECKS = [
+    ("cli", test_railway_cli),
+    ("config", test_railway_config),
+    ("dockerfile", test_dockerfile),
+    ("requirements", test_requirements),
+    ("env", test_environment_vars),
+    ("health", test_health_endpoint),
+]
+
+def run_checks():
+    """Executa as verificações em paralelo e exibe a saída de cada uma em ordem."""
+    stdout = _ThreadLocalStdout(sys.stdout)
+    with contextlib.redirect_stdout(stdout), ThreadPoolExecutor(max_workers=len(CHECKS)) as executor:
+        futures = {name: executor.submit(stdout.capture, check) for name, check in CHECKS}
     
-    # Testa variáveis de ambiente
-    env_ok = test_environment_vars()
+    results = {}
+    for name, future in futures.items():
+        results[name], output = future.result()
+        sys.stdout.write(output)
+    return results
+
+def main():
+    """Função principal."""
+    print("🚀 Teste de Deploy no Railway")
+    print("=" * 50)
     
-    # Testa endpoint de health
-    health_ok = test_health_endpoint()
+    # O probe do CLI (subprocesso) e as leituras de arquivo rodam em paralelo
+    results = run_checks()
+    cli_ok = results["cli"]
+    config_ok = results["config"]
+    dockerfile_ok = results["dockerfile"]
+    requirements_ok = results["requirements"]
+    env_ok = results["env"]
+    health_ok = results["health"]
     
     # Resumo
     print("\n" + "=" * 50)
@@ -4,119 +4,111 @@ Script para Testar Upload de Exame Real na API Analysa
 Testa o fluxo completo: upload → OCR → processamento → resultado
 """
 
-import requests
-import json
+import asyncio
+import contextlib
+import itertools
+import orjson
 import time
 import os
+import re
+import sys
 from pathlib import Path
-from typing import Dict, Any, Optional
 import base64
 
-# Configurações da API
-API_BASE_URL = "https://api-analysa-production.up.railway.app"
-API_VERSION = "v1"
+from _common import (
+    API_BASE_URL,
+    API_VERSION,
+    UPLOAD_TIMEOUT,
+    BaseAPITester,
+    ContextStdout,
+    create_client,
+    run_captured,
+)
 
-class RealExamUploadTester:
-    def __init__(self):
-        self.base_url = f"{API_BASE_URL}/api/{API_VERSION}"
-        self.session = requests.Session()
-        self.auth_token = None
-        self.test_results = []
+# Arquivo de exame usado quando nenhum é passado na linha de comando
+DEFAULT_EXAM_FILE = "Exames Dr. Julio.pdf"
+
+# Padrões da análise de qualidade do OCR, compilados uma única vez
+_WORD_RE = re.compile(r'\S+')
+_NUMBER_RE = re.compile(r'\d+\.?\d*')
+
+# Unidades médicas comuns: o texto OCR é tokenizado uma vez (sequências de
+# letras, µ, ³ e /, começando por letra para que 5000/mm³ gere mm³) e os
+# tokens são cruzados com o conjunto de unidades
+_MEDICAL_UNITS = frozenset(('mg/dL', 'g/dL', 'mm³', 'mg/L', 'mmol/L', 'U/L', 'mEq/L'))
+_UNIT_TOKEN_RE = re.compile(r'[A-Za-zµ][A-Za-zµ³/]*')
+
+class RealExamUploadTester(BaseAPITester):
+    """
+    Testa o fluxo completo de um exame real: upload → OCR → processamento
+    → resultado.
+    
+    Autenticação, paciente de teste e a renovação do token num 401 vêm do
+    BaseAPITester; as requisições passam por self._request.
+    """
+    TITLE = "🧪 TESTE COMPLETO DE UPLOAD DE EXAME REAL"
+    SUMMARY_TITLE = "📊 RESUMO DO TESTE COMPLETO"
+    
+    # Usuário de teste fixo: o token fica em cache entre as execuções
+    TEST_USER = {
+        "email": "test_real_exam@example.com",
+        "password": "TestExam123!",
+        "password_confirm": "TestExam123!",
+        "full_name": "Dr. Teste Exames",
+        "crm": "TESTREALEXAM",
+        "specialty": "Clínico Geral",
+        "phone": "+5511999999999"
+    }
+    
+    TEST_PATIENT = {
+        "full_name": "Maria Santos Teste",
+        "date_of_birth": "1985-05-15",
+        "cpf": "98765432100",
+        "email": "maria.teste@example.com",
+        "phone": "+5511888888888"
+    }
+    
+    def __init__(self, session, exam_file_path=DEFAULT_EXAM_FILE, auth_token=None, patient_id=None):
+        super().__init__(session)
+        self.exam_file_path = Path(exam_file_path)
+        if auth_token:
+            self._set_token(auth_token)
         self.exam_id = None
-        self.patient_id = None
+        self.patient_id = patient_id
+        self._last_result = None  # Resultado do exame já decodificado
+    
+    async def _post_exam(self):
+        """
+        Envia o arquivo de exame.
         
-    def log_test(self, test_name: str, success: bool, details: str = ""):
-        """Registra resultado do teste"""
-        status = "✅ PASS" if success else "❌ FAIL"
-        print(f"{status} {test_name}")
-        if details:
-            print(f"   📝 {details}")
+        O httpx envia o arquivo em blocos direto do descritor (o Content-Length
+        vem do tamanho do arquivo, sem lê-lo inteiro para a memória) e o with
+        garante que ele seja fechado. Se _request repetir o envio após um
+        401, o httpx volta o arquivo ao início antes de reenviá-lo.
+        """
+        data = {
+            'patient_id': self.patient_id,
+            'user_id': self.auth_token  # Usando token como user_id temporariamente
+        }
         
-        self.test_results.append({
-            "test": test_name,
-            "success": success,
-            "details": details
-        })
-    
-    def authenticate(self) -> bool:
-        """Autentica na API"""
-        try:
-            print("🔐 Autenticando na API...")
-            
-            # Criar usuário de teste único
-            timestamp = int(time.time())
-            test_user = {
-                "email": f"test_exam_{timestamp}@example.com",
-                "password": "TestExam123!",
-                "password_confirm": "TestExam123!",
-                "full_name": "Dr. Teste Exames",
-                "crm": f"TEST{timestamp}",
-                "specialty": "Clínico Geral",
-                "phone": "+5511999999999"
-            }
-            
-            # Tentar registro
-            response = self.session.post(f"{self.base_url}/auth/register", json=test_user)
-            if response.status_code not in [200, 201, 409]:
-                print(f"⚠️  Registro falhou: {response.status_code}")
-                return False
-            
-            # Fazer login
-            login_data = {
-                "email": test_user["email"],
-                "password": test_user["password"]
-            }
-            
-            response = self.session.post(f"{self.base_url}/auth/login", json=login_data)
-            if response.status_code == 200:
-                data = response.json()
-                self.auth_token = data.get("access_token")
-                self.session.headers.update({"Authorization": f"Bearer {self.auth_token}"})
-                self.log_test("Authentication", True, f"Token obtido: {self.auth_token[:20]}...")
-                return True
-            else:
-                self.log_test("Authentication", False, f"Login falhou: {response.status_code}")
-                return False
-                
-        except Exception as e:
-            self.log_test("Authentication", False, f"Erro: {str(e)}")
-            return False
-    
-    def create_test_patient(self) -> Optional[str]:
-        """Cria um paciente de teste"""
-        try:
-            print("👤 Criando paciente de teste...")
-            
-            test_patient = {
-                "full_name": "Maria Santos Teste",
-                "date_of_birth": "1985-05-15",
-                "cpf": "98765432100",
-                "email": "maria.teste@example.com",
-                "phone": "+5511888888888"
+        with self.exam_file_path.open('rb') as fh:
+            files = {
+                'file': (self.exam_file_path.name, fh, 'application/pdf')
             }
-            
-            response = self.session.post(f"{self.base_url}/patients/", json=test_patient)
-            if response.status_code in [200, 201]:
-                data = response.json()
-                patient_id = data.get("id")
-                self.patient_id = patient_id
-                self.log_test("Create Test Patient", True, f"Paciente criado: {patient_id}")
-                return patient_id
-            else:
-                self.log_test("Create Test Patient", False, f"Status: {response.status_code}")
-                return None
-                
-        except Exception as e:
-            self.log_test("Create Test Patient", False, f"Erro: {str(e)}")
-            return None
+            return await self._request(
+                "POST",
+                f"{self.base_url}/exams/upload",
+                files=files,
+                data=data
+            )
     
-    def upload_real_exam(self) -> bool:
+    async def upload_real_exam(self) -> bool:
         """Faz upload do arquivo real de exame"""
         try:
             print("📁 Fazendo upload do arquivo real...")
             
             # Caminho para o arquivo real
-            exam_file_path = Path("Exames Dr. Julio.pdf")
+            exam_file_path = self.exam_file_path
             
             if not exam_file_path.exists():
                 self.log_test("File Upload", False, f"Arquivo não encontrado: {exam_file_path}")
@@ -126,22 +118,8 @@ class RealExamUploadTester:
             file_size = exam_file_path.stat().st_size
             print(f"📊 Tamanho do arquivo: {file_size / 1024:.1f} KB")
             
-            # Prepara dados para upload
-            files = {
-                'file': ('Exames Dr. Julio.pdf', open(exam_file_path, 'rb'), 'application/pdf')
-            }
-            
-            data = {
-                'patient_id': self.patient_id,
-                'user_id': self.auth_token  # Usando token como user_id temporariamente
-            }
-            
-            # Faz upload
-            response = self.session.post(
-                f"{self.base_url}/exams/upload",
-                files=files,
-                data=data
-            )
+            # Faz upload (num 401, _request renova o token e reenvia uma vez)
+            response = await self._post_exam()
             
             if response.status_code in [200, 201]:
                 data = response.json()
@@ -159,17 +137,22 @@ class RealExamUploadTester:
             self.log_test("File Upload", False, f"Erro: {str(e)}")
             return False
     
-    def monitor_processing_status(self) -> bool:
+    async def monitor_processing_status(self) -> bool:
         """Monitora o status do processamento do exame"""
         try:
             print("⏳ Monitorando status do processamento...")
             
             max_wait_time = 120  # 2 minutos
-            start_time = time.time()
+            # Relógio monotônico: o prazo não é afetado por ajustes do relógio do sistema
+            deadline = time.monotonic() + max_wait_time
+            # Backoff exponencial: detecta rápido exames curtos e faz menos
+            # requisições quando o processamento demora
+            delay = 1.0
             last_status = None
             
-            while time.time() - start_time < max_wait_time:
-                response = self.session.get(
+            while time.monotonic() < deadline:
+                response = await self._request(
+                    "GET",
                     f"{self.base_url}/exams/{self.exam_id}/status",
                     params={"user_id": self.auth_token}
                 )
@@ -191,11 +174,12 @@ class RealExamUploadTester:
                         self.log_test("Processing Status", False, "Processamento falhou")
                         return False
                     
-                    # Aguarda antes de verificar novamente
-                    time.sleep(5)
                 else:
                     print(f"⚠️  Erro ao verificar status: {response.status_code}")
-                    time.sleep(10)
+                
+                # Aguarda antes de verificar novamente (sem bloquear o event loop)
+                await asyncio.sleep(min(delay, max(deadline - time.monotonic(), 0)))
+                delay = min(delay * 1.5, 10.0)
             
             self.log_test("Processing Status", False, "Timeout aguardando processamento")
             return False
@@ -204,18 +188,22 @@ class RealExamUploadTester:
             self.log_test("Processing Status", False, f"Erro: {str(e)}")
             return False
     
-    def get_exam_result(self) -> bool:
+    async def get_exam_result(self) -> bool:
         """Obtém o resultado completo do exame processado"""
         try:
             print("📊 Obtendo resultado do exame...")
             
-            response = self.session.get(
+            response = await self._request(
+                "GET",
                 f"{self.base_url}/exams/{self.exam_id}/result",
                 params={"user_id": self.auth_token}
             )
             
             if response.status_code == 200:
-                data = response.json()
+                # O payload inteiro é necessário (texto OCR para a validação e
+                # dump opcional), então é decodificado de uma vez com orjson
+                data = orjson.loads(response.content)
+                self._last_result = data
                 
                 # Exibe informações do arquivo
                 file_info = data.get("file_info", {})
@@ -237,7 +225,7 @@ class RealExamUploadTester:
                 biomarkers = data.get("biomarkers", [])
                 if biomarkers:
                     print(f"🔬 Biomarcadores encontrados: {len(biomarkers)}")
-                    for i, biomarker in enumerate(biomarkers[:5]):  # Mostra os primeiros 5
+                    for i, biomarker in enumerate(itertools.islice(biomarkers, 5)):  # Mostra os primeiros 5
                         print(f"   {i+1}. {biomarker.get('name', 'N/A')}: {biomarker.get('value', 'N/A')} {biomarker.get('unit', '')} - Status: {biomarker.get('status', 'N/A')}")
                     
                     if len(biomarkers) > 5:
@@ -245,12 +233,15 @@ class RealExamUploadTester:
                 else:
                     print("⚠️  Nenhum biomarcador encontrado")
                 
-                # Salva resultado em arquivo para análise
-                result_file = f"exam_result_{self.exam_id}.json"
-                with open(result_file, 'w', encoding='utf-8') as f:
-                    json.dump(data, f, indent=2, ensure_ascii=False, default=str)
-                
-                print(f"💾 Resultado salvo em: {result_file}")
+                # Salva resultado em arquivo para análise, só quando pedido
+                # (orjson já grava UTF-8; default=str cobre tipos não serializáveis)
+                if os.environ.get("ANALYSA_DUMP_RESULTS"):
+                    result_file = f"exam_result_{self.exam_id}.json"
+                    Path(result_file).write_bytes(
+                        orjson.dumps(data, default=str, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+                    )
+                    
+                    print(f"💾 Resultado salvo em: {result_file}")
                 
                 self.log_test("Get Exam Result", True, f"Resultado obtido com {len(biomarkers)} biomarcadores")
                 return True
@@ -262,38 +253,34 @@ class RealExamUploadTester:
             self.log_test("Get Exam Result", False, f"Erro: {str(e)}")
             return False
     
-    def validate_ocr_quality(self) -> bool:
+    async def validate_ocr_quality(self) -> bool:
         """Valida a qualidade do OCR"""
         try:
             print("🔍 Validando qualidade do OCR...")
             
-            # Lê o arquivo de resultado
-            result_file = f"exam_result_{self.exam_id}.json"
-            if not os.path.exists(result_file):
-                self.log_test("OCR Quality Validation", False, "Arquivo de resultado não encontrado")
-                return False
-            
-            with open(result_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            # Usa o resultado já em memória; o arquivo salvo só é lido se ele faltar
+            data = self._last_result
+            if data is None:
+                try:
+                    data = orjson.loads(Path(f"exam_result_{self.exam_id}.json").read_bytes())
+                except FileNotFoundError:
+                    self.log_test("OCR Quality Validation", False, "Arquivo de resultado não encontrado")
+                    return False
             
             ocr_text = data.get("ocr_text", "")
             if not ocr_text:
                 self.log_test("OCR Quality Validation", False, "Nenhum texto OCR disponível")
                 return False
             
-            # Análise básica de qualidade
+            # Análise básica de qualidade (apenas contagens, sem listas intermediárias)
             total_chars = len(ocr_text)
-            words = ocr_text.split()
-            total_words = len(words)
+            total_words = sum(1 for _ in _WORD_RE.finditer(ocr_text))
             
             # Verifica se há números (indicando valores de exames)
-            import re
-            numbers = re.findall(r'\d+\.?\d*', ocr_text)
-            total_numbers = len(numbers)
+            total_numbers = sum(1 for _ in _NUMBER_RE.finditer(ocr_text))
             
             # Verifica se há unidades médicas comuns
-            medical_units = ['mg/dL', 'g/dL', 'mm³', 'mg/L', 'mmol/L', 'U/L', 'mEq/L']
-            units_found = [unit for unit in medical_units if unit in ocr_text]
+            units_found = sorted(_MEDICAL_UNITS.intersection(_UNIT_TOKEN_RE.findall(ocr_text)))
             
             print(f"📊 Análise do OCR:")
             print(f"   Caracteres: {total_chars}")
@@ -327,73 +314,91 @@ class RealExamUploadTester:
             self.log_test("OCR Quality Validation", False, f"Erro: {str(e)}")
             return False
     
-    def run_complete_test(self):
-        """Executa o teste completo de upload e processamento"""
-        print("🧪 TESTE COMPLETO DE UPLOAD DE EXAME REAL")
-        print("=" * 70)
-        print(f"🌐 API: {API_BASE_URL}")
-        print(f"📁 Arquivo: Exames Dr. Julio.pdf")
-        print("=" * 70)
-        
+    async def prepare(self) -> bool:
+        """Autentica e obtém o paciente de teste (uma vez, antes dos uploads)"""
         # 1. Autenticação
-        if not self.authenticate():
+        if not await self.authenticate():
             print("❌ Falha na autenticação. Abortando teste.")
             return False
         
         # 2. Criar paciente de teste
-        if not self.create_test_patient():
+        self.patient_id = await self.ensure_patient()
+        if not self.patient_id:
             print("❌ Falha ao criar paciente. Abortando teste.")
             return False
         
+        return True
+    
+    async def run_complete_test(self):
+        """
+        Executa o teste completo de upload e processamento.
+        
+        Usa o token e o paciente recebidos no construtor; sem eles, autentica
+        e obtém o paciente antes do upload.
+        """
+        print(self.TITLE)
+        print("=" * 70)
+        print(f"🌐 API: {API_BASE_URL}")
+        print(f"📁 Arquivo: {self.exam_file_path.name}")
+        print("=" * 70)
+        
+        if not (self.auth_token and self.patient_id) and not await self.prepare():
+            return False
+        
         # 3. Upload do arquivo real
-        if not self.upload_real_exam():
+        if not await self.upload_real_exam():
             print("❌ Falha no upload. Abortando teste.")
             return False
         
         # 4. Monitorar processamento
-        if not self.monitor_processing_status():
+        if not await self.monitor_processing_status():
             print("❌ Falha no processamento. Abortando teste.")
             return False
         
         # 5. Obter resultado
-        if not self.get_exam_result():
+        if not await self.get_exam_result():
             print("❌ Falha ao obter resultado. Abortando teste.")
             return False
         
         # 6. Validar qualidade do OCR
-        self.validate_ocr_quality()
+        await self.validate_ocr_quality()
         
         # Resumo final
-        print("\n" + "=" * 70)
-        print("📊 RESUMO DO TESTE COMPLETO")
-        print("=" * 70)
-        
-        total_tests = len(self.test_results)
-        passed_tests = sum(1 for result in self.test_results if result["success"])
-        failed_tests = total_tests - passed_tests
-        
-        print(f"Total de Testes: {total_tests}")
-        print(f"✅ Passou: {passed_tests}")
-        print(f"❌ Falhou: {failed_tests}")
-        print(f"📈 Taxa de Sucesso: {(passed_tests/total_tests)*100:.1f}%")
-        
-        if failed_tests > 0:
-            print("\n❌ TESTES QUE FALHARAM:")
-            for result in self.test_results:
-                if not result["success"]:
-                    print(f"  - {result['test']}: {result['details']}")
-        
-        print(f"\n🆔 ID do Exame: {self.exam_id}")
+        success = self.summary()
+        print(f"🆔 ID do Exame: {self.exam_id}")
         print(f"👤 ID do Paciente: {self.patient_id}")
-        print(f"🌐 URL da API: {API_BASE_URL}")
-        print(f"📚 Documentação: {API_BASE_URL}/docs")
         
-        return passed_tests == total_tests
+        return success
+
+async def _run(exam_files):
+    """
+    Executa o teste completo para cada arquivo de exame, em paralelo.
+    
+    Todos os testers compartilham um único cliente HTTP/2, então o tempo
+    total acompanha o exame mais lento em vez da soma de todos. A
+    autenticação e o paciente de teste são resolvidos uma única vez antes
+    (evitando registros e criações de paciente concorrentes), e a saída de
+    cada tester é exibida de uma vez, na ordem dos arquivos.
+    """
+    async with create_client(f"{API_BASE_URL}/api/{API_VERSION}", timeout=UPLOAD_TIMEOUT) as session:
+        setup = RealExamUploadTester(session)
+        if not await setup.prepare():
+            return False
+        
+        testers = [
+            RealExamUploadTester(session, exam_file, setup.auth_token, setup.patient_id)
+            for exam_file in exam_files
+        ]
+        with contextlib.redirect_stdout(ContextStdout(sys.stdout)):
+            outcomes = await asyncio.gather(*(run_captured(tester.run_complete_test) for tester in testers))
+    
+    sys.stdout.write("".join(output for _, output in outcomes))
+    return all(result is True for result, _ in outcomes)
 
 def main():
     """Função principal"""
-    tester = RealExamUploadTester()
-    success = tester.run_complete_test()
+    exam_files = sys.argv[1:] or [DEFAULT_EXAM_FILE]
+    success = asyncio.run(_run(exam_files))
     
     if success:
         print("\n🎉 TESTE COMPLETO REALIZADO COM SUCESSO!")
@@ -3,9 +3,11 @@
 Script para testar funcionalidades reais da aplicação.
 """
 
-import os
+import asyncio
+import contextlib
+import importlib
+import io
 import sys
-import tempfile
 from pathlib import Path
 
 # Adiciona o diretório src ao path
@@ -16,13 +18,91 @@ sys.path.insert(0, str(src_path))
 from test_env import setup_test_environment
 setup_test_environment()
 
+from _common import ContextStdout, load_routers, run_captured
+
+# Erros de importação dos módulos da aplicação, por nome de módulo
+_IMPORT_ERRORS = {}
+
+def _import_names(module_name, *names):
+    """
+    Importa nomes de um módulo da aplicação, na carga do script.
+    
+    Se o módulo não puder ser importado, os nomes ficam como None e o erro
+    é guardado para ser exibido pelo teste que depende dele.
+    """
+    try:
+        module = importlib.import_module(module_name)
+        return tuple(getattr(module, name) for name in names)
+    except Exception as e:
+        _IMPORT_ERRORS[module_name] = e
+        return (None,) * len(names)
+
+def _require(*module_names):
+    """Relança o erro de importação do primeiro módulo indisponível."""
+    for module_name in module_names:
+        if module_name in _IMPORT_ERRORS:
+            raise _IMPORT_ERRORS[module_name]
+
+# Módulos da aplicação importados uma única vez, antes de os testes rodarem
+# em paralelo (o custo de importação fica fora do corpo dos testes)
+(OCRService,) = _import_names("services.ocr_service", "OCRService")
+(BiomarkerParser,) = _import_names("services.parser_service", "BiomarkerParser")
+(BiomarkerService,) = _import_names("services.biomarker_service", "BiomarkerService")
+UserRegisterRequest, UserLoginRequest = _import_names("models.auth", "UserRegisterRequest", "UserLoginRequest")
+PatientCreate, PatientUpdate = _import_names("models.patient", "PatientCreate", "PatientUpdate")
+(get_supabase_client,) = _import_names("core.supabase_client", "get_supabase_client")
+
+# Payloads fixos dos testes, construídos uma única vez na carga do script
+_HB_BIOMARKER = {
+    "type": "hemoglobina",
+    "normalized_name": "Hb",
+    "raw_name": "Hemoglobina",
+    "value": 14.5,
+    "unit": "g/dL",
+    "raw_text": "Hemoglobina: 14.5 g/dL",
+    "confidence": 90.0
+}
+
+_HB_RANGE = {
+    "min_value": 12.0,
+    "max_value": 16.0,
+    "unit": "g/dL"
+}
+
+_USER_DATA = {
+    "email": "dr.silva@exemplo.com",
+    "password": "senha123456",
+    "password_confirm": "senha123456",
+    "full_name": "Dr. João Silva",
+    "crm": "12345-SP",
+    "specialty": "Cardiologia",
+    "phone": "(11) 99999-9999"
+}
+
+_LOGIN_DATA = {
+    "email": "dr.silva@exemplo.com",
+    "password": "senha123456"
+}
+
+_PATIENT_DATA = {
+    "full_name": "João Silva",
+    "cpf": "12345678901",
+    "birth_date": "1990-01-01",
+    "gender": "M",
+    "phone": "11999999999",
+    "address": "Rua das Flores, 123 - São Paulo/SP"
+}
+
+_PATIENT_UPDATE_DATA = {
+    "full_name": "João Silva Atualizado"
+}
+
 def test_ocr_functionality():
     """Testa funcionalidade real do OCR."""
     print("🔍 Testando funcionalidade real do OCR...")
     
     try:
-        from services.ocr_service import OCRService
-        from services.parser_service import BiomarkerParser
+        _require("services.ocr_service", "services.parser_service")
         
         # Cria serviço OCR
         ocr_service = OCRService()
@@ -48,41 +128,33 @@ def test_ocr_functionality():
         Ureia: 25 mg/dL
         """
         
-        # Cria arquivo temporário
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.txt', delete=False) as f:
-            f.write(test_text)
-            temp_file = f.name
+        async def _read_and_parse(stream):
+            """Lê o texto e faz o parsing no mesmo event loop."""
+            text = await ocr_service._read_text_stream(stream)
+            return text, (await parser.parse_text(text) if text else None)
         
-        try:
-            # Testa processamento do arquivo (função async)
-            import asyncio
-            result = asyncio.run(ocr_service._read_text_file(temp_file))
+        # Testa processamento do texto (em memória, sem arquivo temporário)
+        # e parsing dos biomarcadores (funções async) com um único asyncio.run
+        result, parse_result = asyncio.run(_read_and_parse(io.StringIO(test_text)))
+        
+        if result:
+            print("✅ Processamento de arquivo funcionando")
+            print(f"   - Texto extraído: {len(result)} caracteres")
             
-            if result:
-                print("✅ Processamento de arquivo funcionando")
-                print(f"   - Texto extraído: {len(result)} caracteres")
+            if parse_result["success"]:
+                print("✅ Parsing de biomarcadores funcionando")
+                print(f"   - Biomarcadores encontrados: {parse_result['total_found']}")
                 
-                # Testa parsing dos biomarcadores (função async)
-                parse_result = asyncio.run(parser.parse_text(result))
+                for biomarker in parse_result["biomarkers"]:
+                    print(f"   - {biomarker['raw_name']}: {biomarker['value']} {biomarker['unit']}")
                 
-                if parse_result["success"]:
-                    print("✅ Parsing de biomarcadores funcionando")
-                    print(f"   - Biomarcadores encontrados: {parse_result['total_found']}")
-                    
-                    for biomarker in parse_result["biomarkers"]:
-                        print(f"   - {biomarker['raw_name']}: {biomarker['value']} {biomarker['unit']}")
-                    
-                    return True
-                else:
-                    print(f"❌ Parsing falhou: {parse_result.get('error', 'Erro desconhecido')}")
-                    return False
+                return True
             else:
-                print("❌ Processamento falhou")
+                print(f"❌ Parsing falhou: {parse_result.get('error', 'Erro desconhecido')}")
                 return False
-                
-        finally:
-            # Limpa arquivo temporário
-            os.unlink(temp_file)
+        else:
+            print("❌ Processamento falhou")
+            return False
             
     except Exception as e:
         print(f"❌ Erro ao testar OCR: {e}")
@@ -93,32 +165,17 @@ def test_biomarker_analysis():
     print("\n🔬 Testando análise real de biomarcadores...")
     
     try:
-        from services.biomarker_service import BiomarkerService
+        _require("services.biomarker_service")
         
         # Cria serviço
         service = BiomarkerService()
         print("✅ BiomarkerService criado")
         
-        # Testa análise de um biomarcador
-        test_biomarker = {
-            "type": "hemoglobina",
-            "normalized_name": "Hb",
-            "raw_name": "Hemoglobina",
-            "value": 14.5,
-            "unit": "g/dL",
-            "raw_text": "Hemoglobina: 14.5 g/dL",
-            "confidence": 90.0
-        }
-        
-        # Simula análise
+        # Testa análise de um biomarcador (simulada)
         analysis_result = service._analyze_value(
-            test_biomarker["value"], 
-            test_biomarker["unit"], 
-            {
-                "min_value": 12.0,
-                "max_value": 16.0,
-                "unit": "g/dL"
-            }
+            _HB_BIOMARKER["value"], 
+            _HB_BIOMARKER["unit"], 
+            _HB_RANGE
         )
         
         print("✅ Análise de biomarcadores funcionando")
@@ -141,32 +198,17 @@ def test_auth_functionality():
     print("\n🔐 Testando funcionalidade real de autenticação...")
     
     try:
-        from models.auth import UserRegisterRequest, UserLoginRequest
+        _require("models.auth")
         
         # Testa criação de usuário
-        user_data = {
-            "email": "dr.silva@exemplo.com",
-            "password": "senha123456",
-            "password_confirm": "senha123456",
-            "full_name": "Dr. João Silva",
-            "crm": "12345-SP",
-            "specialty": "Cardiologia",
-            "phone": "(11) 99999-9999"
-        }
-        
-        user = UserRegisterRequest(**user_data)
+        user = UserRegisterRequest.model_validate(_USER_DATA)
         print("✅ Criação de usuário funcionando")
         print(f"   - Email: {user.email}")
         print(f"   - Nome: {user.full_name}")
         print(f"   - CRM: {user.crm}")
         
         # Testa login
-        login_data = {
-            "email": "dr.silva@exemplo.com",
-            "password": "senha123456"
-        }
-        
-        login = UserLoginRequest(**login_data)
+        login = UserLoginRequest.model_validate(_LOGIN_DATA)
         print("✅ Login funcionando")
         print(f"   - Email: {login.email}")
         
@@ -181,30 +223,17 @@ def test_patient_functionality():
     print("\n👥 Testando funcionalidade real de pacientes...")
     
     try:
-        from models.patient import PatientCreate, PatientUpdate
+        _require("models.patient")
         
         # Testa criação de paciente
-        patient_data = {
-            "full_name": "João Silva",
-            "cpf": "12345678901",
-            "birth_date": "1990-01-01",
-            "gender": "M",
-            "phone": "11999999999",
-            "address": "Rua das Flores, 123 - São Paulo/SP"
-        }
-        
-        patient = PatientCreate(**patient_data)
+        patient = PatientCreate.model_validate(_PATIENT_DATA)
         print("✅ Criação de paciente funcionando")
         print(f"   - Nome: {patient.full_name}")
         print(f"   - CPF: {patient.cpf}")
         print(f"   - Data de nascimento: {patient.birth_date}")
         
         # Testa atualização
-        update_data = {
-            "full_name": "João Silva Atualizado"
-        }
-        
-        update = PatientUpdate(**update_data)
+        update = PatientUpdate.model_validate(_PATIENT_UPDATE_DATA)
         print("✅ Atualização de paciente funcionando")
         print(f"   - Nome atualizado: {update.full_name}")
         
@@ -219,30 +248,22 @@ def test_api_endpoints():
     print("\n🌐 Testando endpoints da API...")
     
     try:
-        from api.auth import router as auth_router
-        from api.patients import router as patients_router
-        from api.exams import router as exams_router
+        auth_router, patients_router, exams_router = load_routers()
         
         # Verifica rotas de auth
-        auth_routes = [route.path for route in auth_router.routes]
         print("✅ Router de autenticação configurado")
-        print(f"   - Rotas: {len(auth_routes)}")
-        for route in auth_routes:
-            print(f"     - {route}")
+        print(f"   - Rotas: {len(auth_router.routes)}")
+        sys.stdout.write("".join(f"     - {route.path}\n" for route in auth_router.routes))
         
         # Verifica rotas de pacientes
-        patient_routes = [route.path for route in patients_router.routes]
         print("✅ Router de pacientes configurado")
-        print(f"   - Rotas: {len(patient_routes)}")
-        for route in patient_routes:
-            print(f"     - {route}")
+        print(f"   - Rotas: {len(patients_router.routes)}")
+        sys.stdout.write("".join(f"     - {route.path}\n" for route in patients_router.routes))
         
         # Verifica rotas de exames
-        exam_routes = [route.path for route in exams_router.routes]
         print("✅ Router de exames configurado")
-        print(f"   - Rotas: {len(exam_routes)}")
-        for route in exam_routes:
-            print(f"     - {route}")
+        print(f"   - Rotas: {len(exams_router.routes)}")
+        sys.stdout.write("".join(f"     - {route.path}\n" for route in exams_router.routes))
         
         return True
         
@@ -250,20 +271,22 @@ def test_api_endpoints():
         print(f"❌ Erro ao testar endpoints: {e}")
         return False
 
-def test_database_integration():
+async def test_database_integration():
     """Testa integração real com banco de dados."""
     print("\n🗄️ Testando integração real com banco de dados...")
     
     try:
-        from core.supabase_client import get_supabase_client
+        _require("core.supabase_client")
         
-        # Tenta conectar com Supabase
-        supabase = get_supabase_client()
+        # Tenta conectar com Supabase (o cliente é síncrono: roda em uma thread)
+        supabase = await asyncio.to_thread(get_supabase_client)
         print("✅ Cliente Supabase criado")
         
         # Testa conexão básica
         try:
-            result = supabase.table("users").select("count", count="exact").execute()
+            result = await asyncio.to_thread(
+                lambda: supabase.table("users").select("count", count="exact").execute()
+            )
             print("✅ Conexão com banco estabelecida")
             print(f"   - Total de usuários: {result.count}")
             return True
@@ -276,28 +299,46 @@ def test_database_integration():
         print(f"❌ Erro ao testar integração com banco: {e}")
         return False
 
+async def run_tests():
+    """
+    Executa os testes em paralelo: OCR, análise, autenticação, pacientes e
+    endpoints rodam em threads enquanto o teste de banco aguarda o Supabase.
+    
+    A saída de cada teste é acumulada em memória e escrita de uma vez, na
+    ordem dos testes, sem intercalar.
+    
+    Returns:
+        Lista com o resultado de cada teste (exceções contam como falha)
+    """
+    tests = [
+        test_ocr_functionality,
+        test_biomarker_analysis,
+        test_auth_functionality,
+        test_patient_functionality,
+        test_api_endpoints,
+        test_database_integration,
+    ]
+    with contextlib.redirect_stdout(ContextStdout(sys.stdout)):
+        outcomes = await asyncio.gather(*(run_captured(test) for test in tests))
+    
+    sys.stdout.write("".join(output for _, output in outcomes))
+    return [result is True for result, _ in outcomes]
+
 def main():
     """Função principal."""
     print("🧪 TESTE DE FUNCIONALIDADES REAIS - API de Exames Médicos")
     print("=" * 70)
     
-    # Testa OCR
-    ocr_ok = test_ocr_functionality()
-    
-    # Testa análise de biomarcadores
-    analysis_ok = test_biomarker_analysis()
-    
-    # Testa autenticação
-    auth_ok = test_auth_functionality()
-    
-    # Testa pacientes
-    patients_ok = test_patient_functionality()
-    
-    # Testa endpoints da API
-    endpoints_ok = test_api_endpoints()
+    # Importa os routers uma vez antes do disparo paralelo (em caso de erro,
+    # o teste de endpoints tenta de novo e exibe a mensagem)
+    try:
+        load_routers()
+    except Exception:
+        pass
     
-    # Testa integração com banco
-    database_ok = test_database_integration()
+    # Testa OCR, análise de biomarcadores, autenticação, pacientes,
+    # endpoints da API e integração com banco, em um único event loop
+    ocr_ok, analysis_ok, auth_ok, patients_ok, endpoints_ok, database_ok = asyncio.run(run_tests())
     
     # Resumo
     print("\n" + "=" * 70)
@@ -6,13 +6,18 @@ Testa os módulos diretamente sem importar main.py
 
 import sys
 import os
-import subprocess
 from pathlib import Path
 
 # Adiciona o diretório src ao path
 src_path = Path(__file__).parent.parent / "src"
 sys.path.insert(0, str(src_path))
 
+# Raiz do repositório e arquivos de teste executados pelo pytest
+REPO_ROOT = Path(__file__).resolve().parent.parent
+PYTEST_FILES = ["tests/test_auth.py", "tests/test_patients.py"]
+
+from _common import run_buffered
+
 def test_auth_module():
     """Testa o módulo de autenticação."""
     print("🔐 Testando módulo de autenticação...")
@@ -31,7 +36,7 @@ def test_auth_module():
             "specialty": "Cardiologia",
             "phone": "11999999999"
         }
-        user_req = UserRegisterRequest(**user_data)
+        user_req = UserRegisterRequest.model_validate(user_data)
         print(f"✅ UserRegisterRequest criado: {user_req.email}")
         
         return True
@@ -56,7 +61,7 @@ def test_patients_module():
             "phone": "11999999999",
             "address": "Rua das Flores, 123 - São Paulo/SP"
         }
-        patient_req = PatientCreate(**patient_data)
+        patient_req = PatientCreate.model_validate(patient_data)
         print(f"✅ PatientCreate criado: {patient_req.full_name}")
         
         return True
@@ -68,34 +73,36 @@ def test_api_endpoints():
     """Testa os endpoints da API."""
     print("🌐 Testando endpoints da API...")
     try:
-        # Testa se os arquivos de API existem
-        from pathlib import Path
+        # Testa se os arquivos de API existem: uma única leitura do diretório
+        # (DirEntry.stat() reaproveita os dados já obtidos pelo scandir)
+        with os.scandir(src_path / "api") as it:
+            entries = {entry.name: entry for entry in it}
         
-        auth_file = Path(__file__).parent.parent / "src" / "api" / "auth.py"
-        patients_file = Path(__file__).parent.parent / "src" / "api" / "patients.py"
+        auth_ok = "auth.py" in entries
+        patients_ok = "patients.py" in entries
         
-        if auth_file.exists():
+        if auth_ok:
             print("✅ Arquivo auth.py encontrado")
         else:
             print("❌ Arquivo auth.py não encontrado")
             
-        if patients_file.exists():
+        if patients_ok:
             print("✅ Arquivo patients.py encontrado")
         else:
             print("❌ Arquivo patients.py não encontrado")
         
         # Verifica se os arquivos têm conteúdo
-        if auth_file.exists() and auth_file.stat().st_size > 0:
+        if auth_ok and entries["auth.py"].stat().st_size > 0:
             print("✅ Arquivo auth.py tem conteúdo")
         else:
             print("❌ Arquivo auth.py está vazio")
             
-        if patients_file.exists() and patients_file.stat().st_size > 0:
+        if patients_ok and entries["patients.py"].stat().st_size > 0:
             print("✅ Arquivo patients.py tem conteúdo")
         else:
             print("❌ Arquivo patients.py está vazio")
         
-        return auth_file.exists() and patients_file.exists()
+        return auth_ok and patients_ok
     except Exception as e:
         print(f"❌ Erro nos endpoints: {e}")
         return False
@@ -104,29 +111,20 @@ def run_pytest_tests():
     """Executa os testes pytest."""
     print("\n🧪 Executando testes pytest...")
     try:
-        # Testa auth
-        result = subprocess.run([
-            "python3", "-m", "pytest", 
-            "tests/test_auth.py", 
-            "-v", "--tb=short"
-        ], capture_output=True, text=True, cwd=Path(__file__).parent.parent)
-        
-        if result.returncode == 0:
-            print("✅ Testes de auth passaram")
-        else:
-            print(f"❌ Testes de auth falharam: {result.stderr}")
+        import pytest
         
-        # Testa patients
-        result = subprocess.run([
-            "python3", "-m", "pytest", 
-            "tests/test_patients.py", 
-            "-v", "--tb=short"
-        ], capture_output=True, text=True, cwd=Path(__file__).parent.parent)
+        # Testa auth e patients numa única execução em processo: um só
+        # carregamento do pytest, dos plugins e do conftest (a saída do
+        # pytest já aparece no terminal, inclusive em caso de falha)
+        result = pytest.main([
+            *(str(REPO_ROOT / path) for path in PYTEST_FILES),
+            "-v", "--tb=short", "-p", "no:cacheprovider"
+        ])
         
-        if result.returncode == 0:
-            print("✅ Testes de patients passaram")
+        if result == 0:
+            print("✅ Testes de auth e patients passaram")
         else:
-            print(f"❌ Testes de patients falharam: {result.stderr}")
+            print(f"❌ Testes de auth e patients falharam (código {int(result)})")
         
         return True
     except Exception as e:
@@ -138,12 +136,12 @@ def main():
     print("🚀 API de Exames Médicos - Testes Sprint 4 (Direto)")
     print("=" * 60)
     
-    # Testa módulos individualmente
-    auth_ok = test_auth_module()
-    patients_ok = test_patients_module()
-    endpoints_ok = test_api_endpoints()
+    # Testa módulos individualmente (saída de cada teste escrita de uma vez)
+    auth_ok = run_buffered(test_auth_module)
+    patients_ok = run_buffered(test_patients_module)
+    endpoints_ok = run_buffered(test_api_endpoints)
     
-    # Executa testes pytest
+    # Executa testes pytest (sem buffer: o progresso aparece em tempo real)
     pytest_ok = run_pytest_tests()
     
     # Resumo
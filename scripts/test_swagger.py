@@ -11,6 +11,8 @@ from pathlib import Path
 src_path = Path(__file__).parent.parent / "src"
 sys.path.insert(0, str(src_path))
 
+from _common import load_routers, run_buffered
+
 def test_swagger_config():
     """Testa se o Swagger está configurado corretamente."""
     print("🔍 Testando configuração do Swagger/OpenAPI...")
@@ -18,7 +20,6 @@ def test_swagger_config():
     try:
         # Verifica se o FastAPI está configurado com Swagger
         from fastapi import FastAPI
-        from fastapi.openapi.utils import get_openapi
         
         # Cria uma instância temporária para testar
         app = FastAPI(
@@ -36,18 +37,14 @@ def test_swagger_config():
         print("✅ Swagger UI configurado em /docs")
         print("✅ ReDoc configurado em /redoc")
         
-        # Gera OpenAPI schema
-        openapi_schema = get_openapi(
-            title=app.title,
-            version=app.version,
-            description=app.description,
-            routes=app.routes,
-        )
+        # Verifica os metadados que vão para o OpenAPI direto na aplicação
+        # (gerar o schema percorreria todas as rotas e modelos à toa)
+        assert app.openapi_url == "/openapi.json", "OpenAPI não está habilitado"
         
-        print("✅ OpenAPI schema gerado com sucesso")
-        print(f"   - Título: {openapi_schema['info']['title']}")
-        print(f"   - Versão: {openapi_schema['info']['version']}")
-        print(f"   - Descrição: {openapi_schema['info']['description']}")
+        print("✅ OpenAPI configurado em /openapi.json")
+        print(f"   - Título: {app.title}")
+        print(f"   - Versão: {app.version}")
+        print(f"   - Descrição: {app.description}")
         
         return True
         
@@ -60,28 +57,17 @@ def test_api_structure():
     print("\n🏗️ Testando estrutura da API...")
     
     try:
-        # Verifica se os routers estão definidos
-        from api import auth, patients, exams
+        # Verifica se os routers estão definidos (importados uma única vez)
+        auth_router, patients_router, exams_router = load_routers()
         
         print("✅ Módulo auth importado")
         print("✅ Módulo patients importado") 
         print("✅ Módulo exams importado")
         
         # Verifica se os routers têm rotas
-        if hasattr(auth, 'router'):
-            print(f"✅ Router de auth tem {len(auth.router.routes)} rotas")
-        else:
-            print("❌ Router de auth não encontrado")
-            
-        if hasattr(patients, 'router'):
-            print(f"✅ Router de patients tem {len(patients.router.routes)} rotas")
-        else:
-            print("❌ Router de patients não encontrado")
-            
-        if hasattr(exams, 'router'):
-            print(f"✅ Router de exams tem {len(exams.router.routes)} rotas")
-        else:
-            print("❌ Router de exams não encontrado")
+        print(f"✅ Router de auth tem {len(auth_router.routes)} rotas")
+        print(f"✅ Router de patients tem {len(patients_router.routes)} rotas")
+        print(f"✅ Router de exams tem {len(exams_router.routes)} rotas")
         
         return True
         
@@ -123,13 +109,13 @@ def main():
     print("=" * 50)
     
     # Testa configuração do Swagger
-    swagger_ok = test_swagger_config()
+    swagger_ok = run_buffered(test_swagger_config)
     
     # Testa estrutura da API
-    api_ok = test_api_structure()
+    api_ok = run_buffered(test_api_structure)
     
     # Testa modelos
-    models_ok = test_models()
+    models_ok = run_buffered(test_models)
     
     # Resumo
     print("\n" + "=" * 50)
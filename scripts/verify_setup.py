@@ -4,26 +4,54 @@ Script para verificar se o setup do Supabase foi realizado com sucesso.
 Verifica tabelas, bucket de storage e políticas RLS.
 """
 
+import functools
 import os
+import re
 import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 from supabase import create_client, Client
-from dotenv import load_dotenv
 
 # Adiciona o diretório src ao path
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
 
+# Linha KEY=valor de um arquivo .env: prefixo export opcional, valor entre
+# aspas (simples ou duplas, só se casadas) ou sem aspas, e comentário final
+# precedido de espaço, como no python-dotenv
+_ENV_LINE_RE = re.compile(
+    r"""^\s*(?:export\s+)?([A-Za-z_][A-Za-z0-9_.]*)\s*="""
+    r"""(?:(?!\s+#)\s*(?:"([^"]*)"|'([^']*)'|(.*?)))?\s*(?:\s#.*)?$"""
+)
+
+def _read_env_file(env_file):
+    """
+    Carrega um arquivo de ambiente (KEY=valor por linha) com uma única
+    leitura, sem sobrescrever variáveis já definidas, como o load_dotenv.
+    """
+    for line in Path(env_file).read_text(encoding='utf-8').splitlines():
+        match = _ENV_LINE_RE.match(line)
+        if not match:
+            continue
+        key, double_quoted, single_quoted, unquoted = match.groups()
+        value = next((v for v in (double_quoted, single_quoted, unquoted) if v is not None), '')
+        os.environ.setdefault(key, value)
+
+@functools.lru_cache(maxsize=1)
 def load_env():
-    """Carrega variáveis de ambiente"""
-    # Tenta carregar do arquivo de produção primeiro
-    env_file = os.path.join(os.path.dirname(__file__), '..', 'env.production')
-    if os.path.exists(env_file):
-        load_dotenv(env_file)
-    else:
-        load_dotenv()
+    """Carrega variáveis de ambiente (uma única vez por processo)"""
+    # Tenta carregar do arquivo de produção primeiro, depois do .env da raiz
+    root = os.path.join(os.path.dirname(__file__), '..')
+    for env_file in ('env.production', '.env'):
+        try:
+            _read_env_file(os.path.join(root, env_file))
+            break
+        except FileNotFoundError:
+            continue
     
     # Verifica se as variáveis necessárias estão definidas
     required_vars = ['SUPABASE_URL', 'SUPABASE_SERVICE_KEY']
-    missing_vars = [var for var in required_vars if not os.getenv(var)]
+    env_map = os.environ
+    missing_vars = [var for var in required_vars if not env_map.get(var)]
     
     if missing_vars:
         print(f"❌ Variáveis de ambiente ausentes: {', '.join(missing_vars)}")
@@ -31,16 +59,50 @@ def load_env():
     
     return True
 
+@functools.lru_cache(maxsize=1)
 def create_supabase_client() -> Client:
     """Cria cliente do Supabase"""
-    url = os.getenv('SUPABASE_URL')
-    key = os.getenv('SUPABASE_SERVICE_KEY')
+    env_map = os.environ
+    url = env_map.get('SUPABASE_URL')
+    key = env_map.get('SUPABASE_SERVICE_KEY')
     
     if not url or not key:
         raise ValueError("SUPABASE_URL e SUPABASE_SERVICE_KEY são obrigatórios")
     
     return create_client(url, key)
 
+def _probe_table(supabase: Client, table: str):
+    """
+    Faz uma consulta simples na tabela, retornando o erro (ou None se der certo).
+    
+    A consulta é um HEAD com contagem: o PostgREST responde só com o header
+    Content-Range, sem transferir nenhuma linha. Como a resposta de erro de
+    um HEAD não tem corpo, uma falha é repetida com um GET de uma linha para
+    obter o erro real do PostgREST (código e mensagem).
+    """
+    try:
+        supabase.table(table).select('id', count='exact', head=True).execute()
+        return None
+    except Exception:
+        pass
+    
+    try:
+        supabase.table(table).select('id').limit(1).execute()
+        return None
+    except Exception as e:
+        return e
+
+def _probe_tables(supabase: Client, tables):
+    """
+    Consulta as tabelas em paralelo: o cliente do Supabase é síncrono, então
+    cada consulta roda em uma thread e o tempo total fica em ~1 round-trip.
+    
+    Returns:
+        Lista com o erro de cada tabela (None se a consulta deu certo), na ordem recebida
+    """
+    with ThreadPoolExecutor(max_workers=len(tables)) as executor:
+        return list(executor.map(lambda table: _probe_table(supabase, table), tables))
+
 def verify_tables(supabase: Client):
     """Verifica se as tabelas foram criadas"""
     print("\n🔍 Verificando tabelas...")
@@ -51,13 +113,14 @@ def verify_tables(supabase: Client):
     
     existing_tables = []
     
-    for table in expected_tables:
-        try:
-            # Tenta fazer uma consulta simples em cada tabela
-            response = supabase.table(table).select('*').limit(1).execute()
+    # Tenta fazer uma consulta simples em cada tabela
+    errors = _probe_tables(supabase, expected_tables)
+    
+    for table, e in zip(expected_tables, errors):
+        if e is None:
             existing_tables.append(table)
             print(f"✅ Tabela {table} encontrada")
-        except Exception as e:
+        else:
             print(f"❌ Tabela {table} não encontrada: {e}")
     
     if len(existing_tables) == len(expected_tables):
@@ -109,12 +172,9 @@ def verify_reference_data(supabase: Client):
     print("\n🔍 Verificando dados de referência...")
     
     try:
-        response = supabase.table('reference_ranges').select('*').execute()
-        
-        if hasattr(response, 'data'):
-            count = len(response.data)
-        else:
-            count = len(response)
+        # Só a contagem (HEAD): as linhas não são transferidas nem materializadas
+        response = supabase.table('reference_ranges').select('id', count='exact', head=True).execute()
+        count = response.count or 0
         
         print(f"Ranges de referência encontrados: {count}")
         
@@ -129,6 +189,17 @@ def verify_reference_data(supabase: Client):
         print(f"❌ Erro ao verificar dados de referência: {e}")
         return False
 
+# Códigos de uma consulta bloqueada: HTTP 401/403 ou insufficient_privilege
+# do Postgres (42501), como vêm no APIError do postgrest-py
+_RLS_DENIED_CODES = {"401", "403", "42501"}
+
+def _is_rls_denial(error):
+    """Verifica se o erro de uma consulta indica bloqueio por RLS/permissão."""
+    if str(getattr(error, "code", "")) in _RLS_DENIED_CODES:
+        return True
+    message = str(error)
+    return "RLS" in message or "permission" in message.lower()
+
 def verify_rls_policies(supabase: Client):
     """Verifica se as políticas RLS foram criadas"""
     print("\n🔍 Verificando políticas RLS...")
@@ -137,16 +208,16 @@ def verify_rls_policies(supabase: Client):
         # Verifica se RLS está habilitado nas tabelas principais
         tables_with_rls = ['users', 'patients', 'exams', 'biomarkers', 'reference_ranges']
         
-        for table in tables_with_rls:
-            try:
-                # Tenta fazer uma consulta que seria bloqueada por RLS
-                response = supabase.table(table).select('*').limit(1).execute()
-                print(f"⚠️  Tabela {table} pode não ter RLS habilitado (consulta retornou dados)")
-            except Exception as e:
-                if "RLS" in str(e) or "permission" in str(e).lower():
-                    print(f"✅ RLS habilitado em {table} (consulta bloqueada)")
-                else:
-                    print(f"⚠️  Erro ao verificar RLS em {table}: {e}")
+        # Tenta fazer uma consulta que seria bloqueada por RLS
+        errors = _probe_tables(supabase, tables_with_rls)
+        
+        for table, e in zip(tables_with_rls, errors):
+            if e is None:
+                print(f"⚠️  Tabela {table} pode não ter RLS habilitado (consulta permitida)")
+            elif _is_rls_denial(e):
+                print(f"✅ RLS habilitado em {table} (consulta bloqueada)")
+            else:
+                print(f"⚠️  Erro ao verificar RLS em {table}: {e}")
         
         print("✅ Verificação de RLS concluída!")
         return True
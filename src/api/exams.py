@@ -2,15 +2,19 @@
 Endpoints para gerenciamento de exames médicos.
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status, UploadFile, File, Form
 from fastapi.responses import JSONResponse
 from typing import Optional
+from concurrent.futures import ProcessPoolExecutor
+import asyncio
+import multiprocessing
+import os
 import uuid
-from datetime import datetime
+from datetime import datetime, timezone
 
-from src.core.supabase_client import supabase_client
-from src.services.storage_service import StorageService
-from src.services.ocr_service import OCRService
+from src.core.supabase_client import SupabaseClient, get_supabase_client, supabase_client
+from src.services.storage_service import StorageService, get_storage_service
+from src.services.ocr_service import OCRService, get_ocr_service
 from src.services.parser_service import biomarker_parser
 from src.services.biomarker_service import biomarker_service
 from src.models.exam import (
@@ -21,17 +25,88 @@ from src.core.logging import api_logger
 
 router = APIRouter()
 
+# Colunas lidas de "exams" por endpoint: evita trazer o ocr_text (que pode ser
+# grande) quando só o status é necessário
+_EXAM_STATUS_COLUMNS = "status,processing_started_at,processing_completed_at"
+_EXAM_RESULT_COLUMNS = (
+    "patient_id,user_id,status,file_name,file_path,file_size,mime_type,"
+    "ocr_text,ocr_confidence,processing_started_at,processing_completed_at,"
+    "created_at,updated_at"
+)
+_EXAM_RESULT_WITH_BIOMARKERS = _EXAM_RESULT_COLUMNS + ",biomarkers(*)"
+
+# Pool de processos para o OCR: pdf2image/PIL/Tesseract são CPU-bound e, no
+# worker do FastAPI, travariam as demais requisições. Criado no startup da
+# aplicação (lifespan) e encerrado no shutdown.
+_ocr_pool: Optional[ProcessPoolExecutor] = None
+
+
+def start_ocr_pool() -> ProcessPoolExecutor:
+    """
+    Cria o pool de processos do OCR, se ainda não existir.
+    
+    Usa o contexto "spawn": com fork, os workers herdariam o estado vivo da
+    API (clientes Supabase em cache, sockets keep-alive, locks de outras
+    threads).
+    """
+    global _ocr_pool
+    if _ocr_pool is None:
+        _ocr_pool = ProcessPoolExecutor(
+            max_workers=os.cpu_count(),
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return _ocr_pool
+
+
+def shutdown_ocr_pool() -> None:
+    """Encerra o pool de processos do OCR (chamado no shutdown da aplicação)."""
+    global _ocr_pool
+    if _ocr_pool is not None:
+        _ocr_pool.shutdown(wait=True, cancel_futures=True)
+        _ocr_pool = None
+
+
+def _run_ocr(file_path: str, mime_type: str, file_name: str) -> dict:
+    """
+    Executa o OCR de um arquivo num processo do pool de OCR.
+    
+    Função de nível de módulo (serializável pelo pickle); cada chamada cria e
+    libera seu próprio OCRService. O arquivo é baixado do storage pelo próprio
+    worker, então o conteúdo não fica retido na API nem é copiado via pickle.
+    O download usa um cliente Supabase novo, criado no worker, e não os
+    singletons em cache da API.
+    """
+    try:
+        file_content = StorageService(SupabaseClient()).download_file(file_path)
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+    
+    ocr_service = OCRService()
+    try:
+        return asyncio.run(ocr_service.process_file_from_bytes(
+            file_content=file_content,
+            file_type=mime_type,
+            file_name=file_name
+        ))
+    finally:
+        # Limpa recursos do OCR
+        ocr_service.cleanup()
+
 
 @router.post("/upload", response_model=ExamUploadResponse)
 async def upload_exam(
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(..., description="Arquivo do exame (PDF, PNG, JPG, TXT)"),
     patient_name: str = Form("", description="Nome do paciente (opcional)"),
-    notes: str = Form("", description="Observações adicionais")
+    notes: str = Form("", description="Observações adicionais"),
+    supabase: SupabaseClient = Depends(get_supabase_client),
+    storage_service: StorageService = Depends(get_storage_service)
 ):
     """
     Upload de exame médico com processamento OCR (SIMPLIFICADO).
     
     Args:
+        background_tasks: Tarefas executadas após o envio da resposta
         file: Arquivo do exame
         patient_name: Nome do paciente (opcional)
         notes: Observações adicionais
@@ -47,6 +122,14 @@ async def upload_exam(
                 detail="Nome do arquivo é obrigatório"
             )
         
+        # Rejeita arquivos grandes antes de carregá-los em memória (o upload
+        # já está num arquivo temporário do Starlette)
+        if file.size is not None and file.size > storage_service.max_file_size:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"Arquivo muito grande (máx: {storage_service.max_file_size / (1024*1024):.1f}MB)"
+            )
+        
         # Lê conteúdo do arquivo
         file_content = await file.read()
         
@@ -56,10 +139,6 @@ async def upload_exam(
                 detail="Arquivo vazio"
             )
         
-        # Inicializa serviços
-        storage_service = StorageService(supabase_client())
-        ocr_service = OCRService()
-        
         # Upload para Supabase Storage
         upload_result = await storage_service.upload_file(
             file_content=file_content,
@@ -76,6 +155,10 @@ async def upload_exam(
         # Gera ID único para o exame
         exam_id = str(uuid.uuid4())
         
+        # Um único instante para todo o registro (created_at == updated_at)
+        now = datetime.now(timezone.utc)
+        now_iso = now.isoformat()
+        
         # Cria registro no banco (SIMPLIFICADO)
         exam_data = {
             "id": exam_id,
@@ -85,13 +168,13 @@ async def upload_exam(
             "file_type": upload_result["mime_type"],
             "mime_type": upload_result["mime_type"],
             "status": ExamStatus.PENDING.value,
-            "created_at": datetime.now().isoformat(),
-            "updated_at": datetime.now().isoformat()
+            "created_at": now_iso,
+            "updated_at": now_iso
         }
         
         # Insere na tabela exams
         try:
-            result = supabase_client().get_table("exams").insert(exam_data).execute()
+            result = await asyncio.to_thread(supabase.get_table("exams").insert(exam_data).execute)
             
             if not result.data:
                 raise Exception("Falha ao inserir exame no banco")
@@ -108,14 +191,16 @@ async def upload_exam(
         asyncio.create_task(
             process_exam_background(
                 exam_id=exam_id,
-                file_content=file_content,
+                file_path=upload_result["file_path"],
                 mime_type=upload_result["mime_type"],
                 file_name=file.filename
             )
         )
         
-        # Log da operação (SIMPLIFICADO)
-        api_logger.log_operation(
+        # Log da operação (SIMPLIFICADO), registrado depois que a resposta
+        # é enviada ao cliente
+        background_tasks.add_task(
+            api_logger.log_operation,
             operation="exam_upload",
             details={
                 "exam_id": exam_id,
@@ -131,7 +216,7 @@ async def upload_exam(
             file_size=upload_result["file_size"],
             file_type=upload_result["mime_type"],
             status=ExamStatus.PENDING,
-            upload_timestamp=datetime.now(),
+            upload_timestamp=now,
             message="Exame enviado com sucesso. Processamento OCR iniciado."
         )
         
@@ -149,7 +234,7 @@ async def upload_exam(
 
 
 @router.get("/{exam_id}/status", response_model=ExamProcessingStatus)
-async def get_exam_status(exam_id: str):
+async def get_exam_status(exam_id: str, supabase: SupabaseClient = Depends(get_supabase_client)):
     """
     Obtém status do processamento de um exame (SIMPLIFICADO).
     
@@ -161,7 +246,9 @@ async def get_exam_status(exam_id: str):
     """
     try:
         # Busca exame no banco
-        result = supabase_client().get_table("exams").select("*").eq("id", exam_id).execute()
+        result = await asyncio.to_thread(
+            supabase.get_table("exams").select(_EXAM_STATUS_COLUMNS).eq("id", exam_id).limit(1).execute
+        )
         
         if not result.data:
             raise HTTPException(
@@ -174,7 +261,7 @@ async def get_exam_status(exam_id: str):
         return ExamProcessingStatus(
             exam_id=exam_id,
             status=ExamStatus(exam["status"]),
-            message=self._get_status_message(exam["status"]),
+            message=_get_status_message(exam["status"]),
             processing_started_at=exam.get("processing_started_at"),
             processing_completed_at=exam.get("processing_completed_at")
         )
@@ -185,7 +272,7 @@ async def get_exam_status(exam_id: str):
         api_logger.log_error(
             error=str(e),
             operation="get_exam_status",
-            user_id=user_id
+            details={"exam_id": exam_id}
         )
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -194,7 +281,11 @@ async def get_exam_status(exam_id: str):
 
 
 @router.get("/{exam_id}/result")
-async def get_exam_result(exam_id: str):
+async def get_exam_result(
+    exam_id: str,
+    supabase: SupabaseClient = Depends(get_supabase_client),
+    storage_service: StorageService = Depends(get_storage_service)
+):
     """
     Obtém resultado completo de um exame (SIMPLIFICADO).
     
@@ -205,8 +296,11 @@ async def get_exam_result(exam_id: str):
         Resultado completo com OCR e biomarcadores
     """
     try:
-        # Busca exame no banco
-        result = supabase_client().get_table("exams").select("*").eq("id", exam_id).execute()
+        # Busca exame e biomarcadores relacionados numa única consulta
+        # (embed do PostgREST pela FK biomarkers.exam_id)
+        result = await asyncio.to_thread(
+            supabase.get_table("exams").select(_EXAM_RESULT_WITH_BIOMARKERS).eq("id", exam_id).limit(1).execute
+        )
         
         if not result.data:
             raise HTTPException(
@@ -223,9 +317,7 @@ async def get_exam_result(exam_id: str):
                 detail="Exame ainda não foi processado completamente"
             )
         
-        # Busca biomarcadores relacionados
-        biomarkers_result = supabase_client().get_table("biomarkers").select("*").eq("exam_id", exam_id).execute()
-        biomarkers = biomarkers_result.data if biomarkers_result.data else []
+        biomarkers = exam.get("biomarkers") or []
         
         # Se não há biomarcadores mas o OCR foi concluído, processa novamente
         if not biomarkers and exam.get("ocr_text"):
@@ -238,17 +330,13 @@ async def get_exam_result(exam_id: str):
                 biomarkers = biomarker_result["biomarkers"]
                 # Atualiza o exame com o resumo
                 if biomarker_result.get("summary"):
-                    supabase_client().get_table("exams").update({
+                    await asyncio.to_thread(supabase.get_table("exams").update({
                         "biomarker_summary": biomarker_result["summary"]["summary_text"],
-                        "updated_at": datetime.now().isoformat()
-                    }).eq("id", exam_id).execute()
-        
-        # Busca informações do arquivo
-        storage_service = StorageService(supabase_client)
-        file_info = await storage_service.get_file_info(exam["file_path"])
+                        "updated_at": datetime.now(timezone.utc).isoformat()
+                    }).eq("id", exam_id).execute)
         
         # Gera link assinado atualizado
-        signed_url = await storage_service._generate_signed_url(exam["file_path"])
+        signed_url, expires_at = await storage_service.get_signed_url(exam["file_path"])
         
         # Monta resposta
         file_info_model = ExamFileInfo(
@@ -258,7 +346,7 @@ async def get_exam_result(exam_id: str):
             mime_type=exam["mime_type"],
             uploaded_at=datetime.fromisoformat(exam["created_at"]),
             signed_url=signed_url,
-            expires_at=datetime.now() + timedelta(seconds=storage_service.signed_url_expiry)
+            expires_at=expires_at
         )
         
         return {
@@ -282,7 +370,7 @@ async def get_exam_result(exam_id: str):
         api_logger.log_error(
             error=str(e),
             operation="get_exam_result",
-            user_id=user_id
+            details={"exam_id": exam_id}
         )
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -290,40 +378,39 @@ async def get_exam_result(exam_id: str):
         )
 
 
-async def process_exam_background(exam_id: str, file_content: bytes, mime_type: str, file_name: str):
+async def process_exam_background(exam_id: str, file_path: str, mime_type: str, file_name: str):
     """
     Processa exame em background (OCR + parsing).
     
     Args:
         exam_id: ID do exame
-        file_content: Conteúdo do arquivo
+        file_path: Caminho do arquivo no storage
         mime_type: Tipo MIME
         file_name: Nome do arquivo
     """
+    supabase = supabase_client()
+    
     try:
         # Atualiza status para PROCESSING
-        supabase_client().get_table("exams").update({
+        started_at = datetime.now(timezone.utc).isoformat()
+        await asyncio.to_thread(supabase.get_table("exams").update({
             "status": ExamStatus.PROCESSING.value,
-            "processing_started_at": datetime.now().isoformat(),
-            "updated_at": datetime.now().isoformat()
-        }).eq("id", exam_id).execute()
-        
-        # Inicializa serviços
-        ocr_service = OCRService()
-        
-        # Processa OCR
-        ocr_result = await ocr_service.process_file_from_bytes(
-            file_content=file_content,
-            file_type=mime_type,
-            file_name=file_name
+            "processing_started_at": started_at,
+            "updated_at": started_at
+        }).eq("id", exam_id).execute)
+        
+        # Processa OCR fora do processo da API
+        loop = asyncio.get_running_loop()
+        ocr_result = await loop.run_in_executor(
+            start_ocr_pool(), _run_ocr, file_path, mime_type, file_name
         )
         
         if not ocr_result["success"]:
             # Falha no OCR
-            supabase_client().get_table("exams").update({
+            await asyncio.to_thread(supabase.get_table("exams").update({
                 "status": ExamStatus.FAILED.value,
-                "updated_at": datetime.now().isoformat()
-            }).eq("id", exam_id).execute()
+                "updated_at": datetime.now(timezone.utc).isoformat()
+            }).eq("id", exam_id).execute)
             
             api_logger.log_error(
                 error=f"OCR falhou: {ocr_result['error']}",
@@ -339,19 +426,20 @@ async def process_exam_background(exam_id: str, file_content: bytes, mime_type:
         )
         
         # Atualiza exame com resultados
+        completed_at = datetime.now(timezone.utc).isoformat()
         update_data = {
             "status": ExamStatus.COMPLETED.value,
             "ocr_text": ocr_result["ocr_text"],
             "ocr_confidence": ocr_result["confidence"],
-            "processing_completed_at": datetime.now().isoformat(),
-            "updated_at": datetime.now().isoformat()
+            "processing_completed_at": completed_at,
+            "updated_at": completed_at
         }
         
         # Adiciona resumo de biomarcadores se disponível
         if biomarker_result["success"] and biomarker_result.get("summary"):
             update_data["biomarker_summary"] = biomarker_result["summary"]["summary_text"]
         
-        supabase_client().get_table("exams").update(update_data).eq("id", exam_id).execute()
+        await asyncio.to_thread(supabase.get_table("exams").update(update_data).eq("id", exam_id).execute)
         
         # Log de sucesso
         api_logger.log_operation(
@@ -366,41 +454,38 @@ async def process_exam_background(exam_id: str, file_content: bytes, mime_type:
         
     except Exception as e:
         # Falha no processamento
-        supabase_client().get_table("exams").update({
+        await asyncio.to_thread(supabase.get_table("exams").update({
             "status": ExamStatus.FAILED.value,
-            "updated_at": datetime.now().isoformat()
-        }).eq("id", exam_id).execute()
+            "updated_at": datetime.now(timezone.utc).isoformat()
+        }).eq("id", exam_id).execute)
         
         api_logger.log_error(
             error=str(e),
             operation="exam_processing",
             details={"exam_id": exam_id}
         )
-    
-    finally:
-        # Limpa recursos do OCR
-        ocr_service.cleanup()
+
+
+# Mensagem descritiva de cada status
+_STATUS_MESSAGES = {
+    ExamStatus.PENDING.value: "Exame aguardando processamento",
+    ExamStatus.PROCESSING.value: "Exame sendo processado (OCR em andamento)",
+    ExamStatus.COMPLETED.value: "Processamento concluído com sucesso",
+    ExamStatus.FAILED.value: "Falha no processamento"
+}
 
 
 def _get_status_message(status: str) -> str:
     """Retorna mensagem descritiva para cada status."""
-    messages = {
-        ExamStatus.PENDING.value: "Exame aguardando processamento",
-        ExamStatus.PROCESSING.value: "Exame sendo processado (OCR em andamento)",
-        ExamStatus.COMPLETED.value: "Processamento concluído com sucesso",
-        ExamStatus.FAILED.value: "Falha no processamento"
-    }
-    return messages.get(status, "Status desconhecido")
+    return _STATUS_MESSAGES.get(status, "Status desconhecido")
 
 
-# Import necessário para asyncio.create_task
-import asyncio
-from datetime import timedelta
-
 # Endpoint de teste temporário (sem autenticação)
 @router.post("/test-upload", response_model=ExamUploadResponse)
 async def test_upload_exam(
-    file: UploadFile = File(..., description="Arquivo do exame (PDF, PNG, JPG, TXT)")
+    file: UploadFile = File(..., description="Arquivo do exame (PDF, PNG, JPG, TXT)"),
+    supabase: SupabaseClient = Depends(get_supabase_client),
+    storage_service: StorageService = Depends(get_storage_service)
 ):
     """
     Endpoint de teste para upload sem autenticação.
@@ -423,10 +508,6 @@ async def test_upload_exam(
                 detail="Arquivo vazio"
             )
         
-        # Inicializa serviços
-        storage_service = StorageService(supabase_client().supabase)
-        ocr_service = OCRService()
-        
         # Upload para Supabase Storage
         upload_result = await storage_service.upload_file(
             file_content=file_content,
@@ -443,6 +524,10 @@ async def test_upload_exam(
         # Gera ID único para o exame
         exam_id = str(uuid.uuid4())
         
+        # Um único instante para todo o registro (created_at == updated_at)
+        now = datetime.now(timezone.utc)
+        now_iso = now.isoformat()
+        
         # Cria registro no banco (sem user_id/patient_id para teste)
         exam_data = {
             "id": exam_id,
@@ -454,13 +539,13 @@ async def test_upload_exam(
             "file_type": upload_result["mime_type"],
             "mime_type": upload_result["mime_type"],
             "status": ExamStatus.PENDING.value,
-            "created_at": datetime.now().isoformat(),
-            "updated_at": datetime.now().isoformat()
+            "created_at": now_iso,
+            "updated_at": now_iso
         }
         
         # Insere na tabela exams
         try:
-            result = supabase_client().get_table("exams").insert(exam_data).execute()
+            result = await asyncio.to_thread(supabase.get_table("exams").insert(exam_data).execute)
             
             if not result.data:
                 raise Exception("Falha ao inserir exame no banco")
@@ -477,7 +562,7 @@ async def test_upload_exam(
         asyncio.create_task(
             process_exam_background(
                 exam_id=exam_id,
-                file_content=file_content,
+                file_path=upload_result["file_path"],
                 mime_type=upload_result["mime_type"],
                 file_name=file.filename
             )
@@ -489,7 +574,7 @@ async def test_upload_exam(
             file_size=upload_result["file_size"],
             file_type=upload_result["mime_type"],
             status=ExamStatus.PENDING,
-            upload_timestamp=datetime.now(),
+            upload_timestamp=now,
             message="Exame enviado com sucesso. Processamento OCR iniciado."
         )
         
@@ -503,14 +588,21 @@ async def test_upload_exam(
 
 # Endpoint de teste para obter resultado sem autenticação
 @router.get("/test-result/{exam_id}")
-async def test_get_exam_result(exam_id: str):
+async def test_get_exam_result(
+    exam_id: str,
+    supabase: SupabaseClient = Depends(get_supabase_client),
+    storage_service: StorageService = Depends(get_storage_service)
+):
     """
     Endpoint de teste para obter resultado sem autenticação.
     APENAS PARA TESTES - REMOVER EM PRODUÇÃO!
     """
     try:
-        # Busca exame no banco
-        result = supabase_client().get_table("exams").select("*").eq("id", exam_id).execute()
+        # Busca exame e biomarcadores relacionados numa única consulta
+        # (embed do PostgREST pela FK biomarkers.exam_id)
+        result = await asyncio.to_thread(
+            supabase.get_table("exams").select(_EXAM_RESULT_WITH_BIOMARKERS).eq("id", exam_id).limit(1).execute
+        )
         
         if not result.data:
             raise HTTPException(
@@ -520,9 +612,7 @@ async def test_get_exam_result(exam_id: str):
         
         exam = result.data[0]
         
-        # Busca biomarcadores relacionados
-        biomarkers_result = supabase_client().get_table("biomarkers").select("*").eq("exam_id", exam_id).execute()
-        biomarkers = biomarkers_result.data if biomarkers_result.data else []
+        biomarkers = exam.get("biomarkers") or []
         
         # Se não há biomarcadores mas o OCR foi concluído, processa novamente
         if not biomarkers and exam.get("ocr_text"):
@@ -535,17 +625,16 @@ async def test_get_exam_result(exam_id: str):
                 biomarkers = biomarker_result["biomarkers"]
                 # Atualiza o exame com o resumo
                 if biomarker_result.get("summary"):
-                    supabase_client().get_table("exams").update({
+                    await asyncio.to_thread(supabase.get_table("exams").update({
                         "biomarker_summary": biomarker_result["summary"]["summary_text"],
-                        "updated_at": datetime.now().isoformat()
-                    }).eq("id", exam_id).execute()
+                        "updated_at": datetime.now(timezone.utc).isoformat()
+                    }).eq("id", exam_id).execute)
         
         # Busca informações do arquivo
-        storage_service = StorageService(supabase_client())
         file_info = await storage_service.get_file_info(exam["file_path"])
         
         # Gera link assinado atualizado
-        signed_url = await storage_service._generate_signed_url(exam["file_path"])
+        signed_url, expires_at = await storage_service.get_signed_url(exam["file_path"])
         
         # Monta resposta
         file_info_model = ExamFileInfo(
@@ -555,7 +644,7 @@ async def test_get_exam_result(exam_id: str):
             mime_type=exam["mime_type"],
             uploaded_at=datetime.fromisoformat(exam["created_at"]),
             signed_url=signed_url,
-            expires_at=datetime.now() + timedelta(seconds=storage_service.signed_url_expiry)
+            expires_at=expires_at
         )
         
         return {
@@ -584,7 +673,9 @@ async def test_get_exam_result(exam_id: str):
 # Endpoint de teste para processamento direto (sem storage)
 @router.post("/test-process", response_model=ExamUploadResponse)
 async def test_process_exam_directly(
-    file: UploadFile = File(..., description="Arquivo do exame (PDF, PNG, JPG, TXT)")
+    file: UploadFile = File(..., description="Arquivo do exame (PDF, PNG, JPG, TXT)"),
+    supabase: SupabaseClient = Depends(get_supabase_client),
+    ocr_service: OCRService = Depends(get_ocr_service)
 ):
     """
     Endpoint de teste para processamento direto sem storage.
@@ -612,9 +703,6 @@ async def test_process_exam_directly(
         # Gera ID único para o exame
         exam_id = str(uuid.uuid4())
         
-        # Inicializa OCR service
-        ocr_service = OCRService()
-        
         # Processa OCR diretamente
         print("🔍 Processando OCR...")
         ocr_result = await ocr_service.process_file_from_bytes(
@@ -640,6 +728,10 @@ async def test_process_exam_directly(
         
         print(f"✅ Biomarcadores processados: {len(biomarker_result.get('biomarkers', []))} encontrados")
         
+        # Um único instante para todo o registro
+        now = datetime.now(timezone.utc)
+        now_iso = now.isoformat()
+        
         # Cria registro no banco (sem file_path)
         exam_data = {
             "id": exam_id,
@@ -653,10 +745,10 @@ async def test_process_exam_directly(
             "status": ExamStatus.COMPLETED.value,
             "ocr_text": ocr_result["ocr_text"],
             "ocr_confidence": ocr_result.get("confidence", 0.0),
-            "processing_started_at": datetime.now().isoformat(),
-            "processing_completed_at": datetime.now().isoformat(),
-            "created_at": datetime.now().isoformat(),
-            "updated_at": datetime.now().isoformat()
+            "processing_started_at": now_iso,
+            "processing_completed_at": now_iso,
+            "created_at": now_iso,
+            "updated_at": now_iso
         }
         
         # Adiciona resumo de biomarcadores se disponível
@@ -665,7 +757,7 @@ async def test_process_exam_directly(
         
         # Insere na tabela exams
         try:
-            result = supabase_client().get_table("exams").insert(exam_data).execute()
+            result = await asyncio.to_thread(supabase.get_table("exams").insert(exam_data).execute)
             
             if not result.data:
                 raise Exception("Falha ao inserir exame no banco")
@@ -688,17 +780,14 @@ async def test_process_exam_directly(
                         "severity": biomarker.get("severity", "none"),
                         "reference_min": biomarker.get("reference_min"),
                         "reference_max": biomarker.get("reference_max"),
-                        "created_at": datetime.now().isoformat()
+                        "created_at": now_iso
                     }
-                    supabase_client().get_table("biomarkers").insert(db_biomarker).execute()
+                    await asyncio.to_thread(supabase.get_table("biomarkers").insert(db_biomarker).execute)
                 
                 print(f"✅ {len(biomarker_result['biomarkers'])} biomarcadores salvos no banco")
             except Exception as e:
                 print(f"⚠️  Erro ao salvar biomarcadores: {str(e)}")
         
-        # Limpa recursos do OCR
-        ocr_service.cleanup()
-        
         print(f"🎉 Processamento completo! ID: {exam_id}")
         
         return ExamUploadResponse(
@@ -707,7 +796,7 @@ async def test_process_exam_directly(
             file_size=len(file_content),
             file_type=file.content_type,
             status=ExamStatus.COMPLETED,
-            upload_timestamp=datetime.now(),
+            upload_timestamp=now,
             message=f"Exame processado com sucesso! OCR: {len(ocr_result['ocr_text'])} chars, Biomarcadores: {len(biomarker_result.get('biomarkers', []))}"
         )
         
@@ -0,0 +1,76 @@
+"""
+Cache em memória com expiração (TTL) e tamanho máximo.
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+
+class TTLCache:
+    """
+    Cache LRU com tempo de vida por entrada.
+    
+    Usado para evitar round-trips repetidos ao Supabase (ex.: links
+    assinados do Storage). Não é compartilhado entre processos/workers.
+    """
+    
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+    
+    def get(self, key: str, default: Any = None) -> Any:
+        """
+        Obtém um valor do cache.
+        
+        Args:
+            key: Chave da entrada
+            default: Valor retornado se a chave não existir ou tiver expirado
+        
+        Returns:
+            Valor armazenado ou default
+        """
+        try:
+            expires_at, value = self._data[key]
+        except KeyError:
+            return default
+        
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            return default
+        
+        self._data.move_to_end(key)
+        return value
+    
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """
+        Armazena um valor no cache.
+        
+        Args:
+            key: Chave da entrada
+            value: Valor a armazenar
+            ttl: Tempo de vida em segundos (usa o padrão do cache se None)
+        """
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0:
+            return
+        
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+        
+        # Remove as entradas menos usadas recentemente
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+    
+    def pop(self, key: str, default: Any = None) -> Any:
+        """Remove uma entrada do cache, retornando seu valor."""
+        entry = self._data.pop(key, None)
+        return default if entry is None else entry[1]
+    
+    def clear(self) -> None:
+        """Remove todas as entradas."""
+        self._data.clear()
+    
+    def __len__(self) -> int:
+        return len(self._data)
@@ -3,6 +3,7 @@ Cliente Supabase para autenticação e operações de banco de dados.
 """
 
 import os
+import functools
 from supabase import create_client, Client
 from typing import Optional, Dict, Any
 import asyncio
@@ -98,7 +99,7 @@ class SupabaseClient:
             Dados do usuário ou None
         """
         try:
-            user = self.supabase.auth.get_user(access_token)
+            user = await asyncio.to_thread(self.supabase.auth.get_user, access_token)
             return user.user
         except Exception:
             return None
@@ -125,7 +126,7 @@ class SupabaseClient:
                 "is_active": True
             }
             
-            result = self.supabase.table("users").insert(data).execute()
+            result = await asyncio.to_thread(self.supabase.table("users").insert(data).execute)
             return len(result.data) > 0
             
         except Exception as e:
@@ -136,6 +137,9 @@ class SupabaseClient:
         """
         Executa operação com retry pattern.
         
+        A operação (chamada síncrona do supabase-py) roda numa thread, para
+        que o round-trip ao Supabase não bloqueie o event loop.
+        
         Args:
             operation: Função a ser executada
             max_retries: Número máximo de tentativas
@@ -153,7 +157,7 @@ class SupabaseClient:
             
         for attempt in range(max_retries):
             try:
-                return operation()
+                return await asyncio.to_thread(operation)
             except Exception as e:
                 if attempt == max_retries - 1:
                     raise e
@@ -184,15 +188,17 @@ class SupabaseClient:
         return self.supabase.storage.from_(bucket_name)
 
 
-# Instância global do cliente (lazy)
-_supabase_client = None
-
-def get_supabase_client():
-    """Retorna o cliente Supabase, criando se necessário."""
-    global _supabase_client
-    if _supabase_client is None:
-        _supabase_client = SupabaseClient()
-    return _supabase_client
+# Instância global do cliente (lazy): criada uma única vez por processo, de
+# modo que todas as requisições reaproveitam as sessões HTTP (keep-alive) do
+# PostgREST, do GoTrue e do Storage em vez de abrir novas conexões TLS
+@functools.lru_cache(maxsize=1)
+def get_supabase_client() -> SupabaseClient:
+    """
+    Retorna o cliente Supabase, criando se necessário.
+    
+    Também serve como dependência do FastAPI: Depends(get_supabase_client).
+    """
+    return SupabaseClient()
 
 # Para compatibilidade com código existente (lazy)
 def supabase_client():
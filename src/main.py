@@ -17,9 +17,13 @@ setup_logging()
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Lifecycle da aplicação."""
+    from src.api.exams import start_ocr_pool, shutdown_ocr_pool
+    
     structlog.get_logger().info("Iniciando API de Processamento de Exames Médicos")
+    start_ocr_pool()
     yield
     structlog.get_logger().info("Encerrando API de Processamento de Exames Médicos")
+    shutdown_ocr_pool()
 
 # Criação da aplicação FastAPI
 def create_app():
@@ -2,7 +2,7 @@
 Modelos Pydantic para exames médicos.
 """
 
-from pydantic import BaseModel, Field, validator
+from pydantic import BaseModel, Field, field_validator
 from typing import Optional, List
 from datetime import datetime
 from enum import Enum
@@ -30,7 +30,8 @@ class ExamUploadRequest(BaseModel):
     patient_id: str = Field(..., description="ID do paciente")
     file_type: Optional[str] = Field(None, description="Tipo do arquivo (inferido automaticamente)")
     
-    @validator('patient_id')
+    @field_validator('patient_id')
+    @classmethod
     def validate_patient_id(cls, v):
         if not v or len(v.strip()) == 0:
             raise ValueError("ID do paciente é obrigatório")
@@ -83,11 +84,6 @@ class Exam(BaseModel):
     processing_completed_at: Optional[datetime] = Field(None, description="Fim do processamento")
     created_at: datetime = Field(..., description="Data de criação")
     updated_at: datetime = Field(..., description="Data de atualização")
-    
-    class Config:
-        json_encoders = {
-            datetime: lambda v: v.isoformat()
-        }
 
 
 class ExamListResponse(BaseModel):
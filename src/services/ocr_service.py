@@ -7,8 +7,9 @@ from PIL import Image
 import pdf2image
 import hashlib
 import asyncio
+import functools
 from concurrent.futures import ThreadPoolExecutor
-from typing import Dict, Any, Optional
+from typing import IO, Dict, Any, Optional
 import tempfile
 import os
 
@@ -186,6 +187,18 @@ class OCRService:
         
         return min(max(confidence * 100, 0.0), 100.0)
     
+    async def _read_text_stream(self, stream: IO[str]) -> str:
+        """
+        Lê texto de um objeto de arquivo já aberto (arquivo, StringIO...).
+        
+        Args:
+            stream: Objeto de arquivo em modo texto
+            
+        Returns:
+            Conteúdo do stream
+        """
+        return stream.read()
+    
     async def _read_text_file(self, file_path: str) -> str:
         """
         Lê arquivo de texto diretamente.
@@ -198,7 +211,7 @@ class OCRService:
         """
         try:
             with open(file_path, 'r', encoding='utf-8') as f:
-                return f.read()
+                return await self._read_text_stream(f)
         except Exception as e:
             raise Exception(f"Erro ao ler arquivo de texto: {str(e)}")
     
@@ -273,3 +286,14 @@ class OCRService:
         """Limpa recursos do executor."""
         if self.executor:
             self.executor.shutdown(wait=True)
+
+
+@functools.lru_cache(maxsize=1)
+def get_ocr_service() -> OCRService:
+    """
+    Retorna o serviço OCR compartilhado (criado uma única vez).
+    
+    O executor interno é thread-safe, então a instância pode ser usada por
+    várias requisições; não chame cleanup() nela.
+    """
+    return OCRService()
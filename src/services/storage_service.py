@@ -4,14 +4,22 @@ Serviço de storage para upload de arquivos no Supabase.
 
 import os
 import uuid
-from datetime import datetime, timedelta
-from typing import Optional, Dict, Any
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Dict, Any, Tuple
 from supabase import Client
 import asyncio
+import functools
 import mimetypes
 
+from src.core.cache import TTLCache
 from src.core.config import get_settings_lazy
 from src.core.logging import api_logger
+from src.core.supabase_client import get_supabase_client
+
+
+# Links assinados são reaproveitados até pouco antes de expirarem
+SIGNED_URL_SAFETY_MARGIN = 60
+SIGNED_URL_CACHE_MAX_TTL = 86400
 
 
 class StorageService:
@@ -23,6 +31,7 @@ class StorageService:
         config = get_settings_lazy()
         self.max_file_size = config.max_file_size
         self.signed_url_expiry = config.signed_url_expiry
+        self._signed_url_cache = TTLCache(maxsize=10000, ttl=SIGNED_URL_CACHE_MAX_TTL)
     
     async def upload_file(self, file_content: bytes, file_name: str, mime_type: Optional[str] = None) -> Dict[str, Any]:
         """
@@ -76,7 +85,7 @@ class StorageService:
                 "file_size": len(file_content),
                 "mime_type": mime_type,
                 "signed_url": signed_url,
-                "expires_at": datetime.now() + timedelta(seconds=self.signed_url_expiry)
+                "expires_at": datetime.now(timezone.utc) + timedelta(seconds=self.signed_url_expiry)
             }
             
         except Exception as e:
@@ -148,6 +157,49 @@ class StorageService:
         except Exception as e:
             raise Exception(f"Erro ao gerar link assinado: {str(e)}")
     
+    async def get_signed_url(self, file_path: str) -> Tuple[str, datetime]:
+        """
+        Retorna um link assinado para o arquivo, reaproveitando o último
+        gerado enquanto ainda for válido (evita uma chamada ao Storage por
+        leitura repetida do mesmo exame).
+        
+        Args:
+            file_path: Caminho do arquivo no storage
+            
+        Returns:
+            Tupla (URL assinada para download, data de expiração do link)
+        """
+        cached = self._signed_url_cache.get(file_path)
+        if cached is None:
+            signed_url = await self._generate_signed_url(file_path)
+            cached = (signed_url, datetime.now(timezone.utc) + timedelta(seconds=self.signed_url_expiry))
+            self._signed_url_cache.set(
+                file_path,
+                cached,
+                ttl=self.signed_url_expiry - SIGNED_URL_SAFETY_MARGIN
+            )
+        return cached
+    
+    def download_file(self, file_path: str) -> bytes:
+        """
+        Baixa o conteúdo de um arquivo do storage.
+        
+        Chamada bloqueante: a partir do event loop da API, use
+        asyncio.to_thread(storage_service.download_file, file_path).
+        
+        Args:
+            file_path: Caminho do arquivo no storage
+            
+        Returns:
+            Conteúdo do arquivo em bytes
+        """
+        try:
+            return self.supabase.get_storage(self.bucket_name).download(
+                file_path.replace(f"{self.bucket_name}/", "", 1)
+            )
+        except Exception as e:
+            raise Exception(f"Erro ao baixar arquivo: {str(e)}")
+    
     async def delete_file(self, file_path: str) -> bool:
         """
         Remove arquivo do storage.
@@ -158,6 +210,9 @@ class StorageService:
         Returns:
             True se removido com sucesso
         """
+        # O link assinado do arquivo removido deixa de ser válido
+        self._signed_url_cache.pop(file_path)
+        
         try:
             # Remove o prefixo do bucket se presente
             if file_path.startswith(f"{self.bucket_name}/"):
@@ -283,3 +338,13 @@ class StorageService:
                 details={"file_path": file_path}
             )
             return None
+
+
+@functools.lru_cache(maxsize=1)
+def get_storage_service() -> StorageService:
+    """
+    Retorna o serviço de storage compartilhado (criado uma única vez).
+    
+    Também serve como dependência do FastAPI: Depends(get_storage_service).
+    """
+    return StorageService(get_supabase_client())
@@ -0,0 +1,23 @@
+-- =====================================================
+-- UNICIDADE DOS RANGES DE REFERÊNCIA
+-- =====================================================
+
+-- Remove duplicatas criadas por execuções repetidas do seed, mantendo o
+-- registro mais antigo de cada (biomarcador, sexo, idade mínima)
+DELETE FROM reference_ranges
+WHERE id IN (
+    SELECT id FROM (
+        SELECT id, ROW_NUMBER() OVER (
+            PARTITION BY biomarker_name, gender, age_min
+            ORDER BY created_at, id
+        ) AS row_number
+        FROM reference_ranges
+    ) ranked
+    WHERE row_number > 1
+);
+
+-- NULLS NOT DISTINCT: ranges sem sexo (gender NULL) também são únicos, e o
+-- upsert do seed (on_conflict=biomarker_name,gender,age_min) usa esta constraint
+ALTER TABLE reference_ranges
+    ADD CONSTRAINT reference_ranges_biomarker_gender_age_key
+    UNIQUE NULLS NOT DISTINCT (biomarker_name, gender, age_min);
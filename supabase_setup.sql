@@ -69,7 +69,8 @@ CREATE TABLE IF NOT EXISTS reference_ranges (
     age_min INTEGER CHECK (age_min > 0),
     age_max INTEGER CHECK (age_max > age_min),
     is_active BOOLEAN DEFAULT true,
-    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    UNIQUE NULLS NOT DISTINCT (biomarker_name, gender, age_min)
 );
 
 -- =====================================================
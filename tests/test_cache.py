@@ -0,0 +1,75 @@
+"""
+Testes para o cache em memória com TTL.
+"""
+
+import pytest
+from unittest.mock import patch
+from src.core.cache import TTLCache
+
+
+class TestTTLCache:
+    """Testes para TTLCache."""
+    
+    @pytest.fixture
+    def cache(self):
+        """Instância do cache para testes."""
+        return TTLCache(maxsize=2, ttl=30)
+    
+    def test_get_returns_stored_value(self, cache):
+        """Testa leitura de valor armazenado."""
+        # Arrange
+        cache.set("token", {"id": "user-1"})
+        
+        # Act
+        result = cache.get("token")
+        
+        # Assert
+        assert result == {"id": "user-1"}
+    
+    def test_get_missing_key(self, cache):
+        """Testa leitura de chave inexistente."""
+        assert cache.get("missing") is None
+        assert cache.get("missing", "default") == "default"
+    
+    def test_entry_expires(self, cache):
+        """Testa expiração da entrada após o TTL."""
+        # Arrange
+        with patch("src.core.cache.time.monotonic", return_value=100.0):
+            cache.set("token", "value", ttl=10)
+        
+        # Act
+        with patch("src.core.cache.time.monotonic", return_value=111.0):
+            result = cache.get("token")
+        
+        # Assert
+        assert result is None
+        assert len(cache) == 0
+    
+    def test_non_positive_ttl_is_not_stored(self, cache):
+        """Testa que valores já expirados não são armazenados."""
+        cache.set("token", "value", ttl=0)
+        
+        assert cache.get("token") is None
+    
+    def test_evicts_least_recently_used(self, cache):
+        """Testa remoção da entrada menos usada quando o cache enche."""
+        # Arrange
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        
+        # Act
+        cache.set("c", 3)
+        
+        # Assert
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        assert cache.get("c") == 3
+    
+    def test_pop(self, cache):
+        """Testa remoção explícita de uma entrada."""
+        cache.set("token", "value")
+        
+        assert cache.pop("token") == "value"
+        assert cache.pop("token") is None
+        assert cache.get("token") is None
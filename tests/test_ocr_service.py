@@ -5,6 +5,7 @@ Testes para o serviço OCR.
 import pytest
 from unittest.mock import Mock, patch, AsyncMock, MagicMock
 from PIL import Image
+import io
 import tempfile
 import os
 
@@ -186,6 +187,18 @@ class TestOCRService:
             # Cleanup
             os.unlink(temp_file_path)
     
+    @pytest.mark.asyncio
+    async def test_read_text_stream(self, ocr_service):
+        """Testa leitura de texto a partir de um stream em memória."""
+        # Arrange
+        stream = io.StringIO("Teste de texto para OCR")
+        
+        # Act
+        result = await ocr_service._read_text_stream(stream)
+        
+        # Assert
+        assert result == "Teste de texto para OCR"
+    
     @pytest.mark.asyncio
     async def test_process_file_text_failure(self, ocr_service):
         """Testa falha no processamento de arquivo de texto."""
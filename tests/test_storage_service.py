@@ -4,7 +4,7 @@ Testes para o serviço de storage.
 
 import pytest
 from unittest.mock import Mock, patch, AsyncMock
-from src.services.storage_service import StorageService
+from src.services.storage_service import StorageService, get_storage_service
 
 
 class TestStorageService:
@@ -164,6 +164,40 @@ class TestStorageService:
         assert unique_name.endswith(".pdf")
         assert len(unique_name) > len(original_name)  # Deve ter UUID
     
+    @pytest.mark.asyncio
+    async def test_get_signed_url_is_cached(self, storage_service, mock_supabase_client):
+        """Testa reaproveitamento do link assinado para o mesmo arquivo."""
+        # Arrange
+        file_path = "exames-medicos/test_file.pdf"
+        storage_service.signed_url_expiry = 3600
+        mock_storage = Mock()
+        mock_storage.create_signed_url.return_value = Mock(signed_url="http://test.com/file")
+        mock_supabase_client.get_storage.return_value = mock_storage
+        
+        # Act
+        first = await storage_service.get_signed_url(file_path)
+        second = await storage_service.get_signed_url(file_path)
+        
+        # Assert
+        assert first == second
+        assert first[0] == "http://test.com/file"
+        mock_storage.create_signed_url.assert_called_once()
+    
+    def test_download_file_success(self, storage_service, mock_supabase_client):
+        """Testa download de arquivo pelo caminho no storage."""
+        # Arrange
+        file_path = "exames-medicos/test_file.pdf"
+        mock_storage = Mock()
+        mock_storage.download.return_value = b"test content"
+        mock_supabase_client.get_storage.return_value = mock_storage
+        
+        # Act
+        result = storage_service.download_file(file_path)
+        
+        # Assert
+        assert result == b"test content"
+        mock_storage.download.assert_called_once_with("test_file.pdf")
+    
     @pytest.mark.asyncio
     async def test_delete_file_success(self, storage_service, mock_supabase_client):
         """Testa remoção bem-sucedida de arquivo."""
@@ -193,3 +227,18 @@ class TestStorageService:
         
         # Assert
         assert result is False
+    
+    def test_get_storage_service_is_cached(self):
+        """Testa que a dependência reutiliza a mesma instância."""
+        # Arrange
+        get_storage_service.cache_clear()
+        
+        # Act
+        with patch("src.services.storage_service.get_supabase_client") as mock_get_client:
+            first = get_storage_service()
+            second = get_storage_service()
+        get_storage_service.cache_clear()
+        
+        # Assert
+        assert first is second
+        mock_get_client.assert_called_once()